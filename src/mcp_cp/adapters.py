@@ -1,16 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
+import itertools
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import InitVar, dataclass, field
+from typing import Any, Protocol, runtime_checkable
 
+from mcp_cp.audit_log import AuditLog
+from mcp_cp.audit_store import (
+    AuditFilter,
+    AuditStore,
+    decode_cursor,
+    encode_cursor,
+    event_time,
+)
+from mcp_cp.index import KBIndex
 from mcp_cp.models import (
     AuditQueryResponse,
-    AuditQueryRow,
     DocumentMetadata,
     DocumentResource,
     KBSearchResponse,
     KBSearchResult,
 )
+from mcp_cp.segments import MmapSegment
 
 
 class KBAdapter(Protocol):
@@ -18,9 +29,69 @@ class KBAdapter(Protocol):
 
     def get_document(self, doc_id: str) -> DocumentResource: ...
 
+    # Raises when the backend cannot serve requests. Only the background
+    # health probes call it (probe() on every adapter protocol).
+    def probe(self) -> None: ...
+
+
+class WritableKBAdapter(KBAdapter, Protocol):
+    def upsert(self, doc: DocumentResource) -> None: ...
+
+    def delete(self, doc_id: str) -> bool: ...
+
+
+@runtime_checkable
+class KBChangeSource(Protocol):
+    # Listeners are called with the id of every upserted or deleted document.
+    def subscribe(self, listener: Callable[[str], None]) -> None: ...
+
 
 class AuditAdapter(Protocol):
-    def query(self, q: str, limit: int) -> AuditQueryResponse: ...
+    def query(
+        self,
+        q: str,
+        limit: int,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> AuditQueryResponse: ...
+
+    def probe(self) -> None: ...
+
+
+class AsyncKBAdapter(Protocol):
+    async def search(self, query: str, top_k: int) -> KBSearchResponse: ...
+
+    async def get_document(self, doc_id: str) -> DocumentResource: ...
+
+    async def probe(self) -> None: ...
+
+
+class AsyncAuditAdapter(Protocol):
+    async def query(
+        self,
+        q: str,
+        limit: int,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> AuditQueryResponse: ...
+
+    async def probe(self) -> None: ...
+
+
+class StreamingAuditAdapter(AuditAdapter, Protocol):
+    # Yields (row, cursor) pairs lazily; each cursor resumes after its row.
+    def stream(
+        self,
+        q: str,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> Iterator[tuple[dict[str, Any], str]]: ...
 
 
 @dataclass
@@ -46,25 +117,167 @@ class InMemoryKBAdapter:
             raise KeyError(f"Document {doc_id} not found")
         return self.documents[doc_id]
 
+    def probe(self) -> None:
+        pass
+
+
+@dataclass
+class IndexedKBAdapter:
+    documents: InitVar[dict[str, DocumentResource]]
+    segment_paths: InitVar[Sequence[str]] = ()
+    index: KBIndex = field(init=False, repr=False)
+    listeners: list[Callable[[str], None]] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(
+        self, documents: dict[str, DocumentResource], segment_paths: Sequence[str]
+    ) -> None:
+        segments = [MmapSegment(path) for path in segment_paths]
+        self.index = KBIndex(documents.values(), segments=segments)
+
+    def search(self, query: str, top_k: int) -> KBSearchResponse:
+        results = [
+            KBSearchResult(
+                id=hit.segment.doc_id(hit.ordinal),
+                title=hit.segment.title(hit.ordinal),
+                snippet=hit.snippet(),
+                score=hit.score,
+            )
+            for hit in self.index.snapshot().search(query, top_k)
+        ]
+        return KBSearchResponse(results=results)
+
+    def get_document(self, doc_id: str) -> DocumentResource:
+        doc = self.index.snapshot().get(doc_id)
+        if doc is None:
+            raise KeyError(f"Document {doc_id} not found")
+        return doc
+
+    def probe(self) -> None:
+        pass
+
+    def upsert(self, doc: DocumentResource) -> None:
+        self.index.upsert(doc)
+        self._changed(doc.metadata.id)
+
+    def delete(self, doc_id: str) -> bool:
+        deleted = self.index.delete(doc_id)
+        if deleted:
+            self._changed(doc_id)
+        return deleted
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        self.listeners.append(listener)
+
+    def _changed(self, doc_id: str) -> None:
+        for listener in self.listeners:
+            listener(doc_id)
+
 
 @dataclass
 class InMemoryAuditAdapter:
     rows: list[dict[str, object]]
 
-    def query(self, q: str, limit: int) -> AuditQueryResponse:
-        filtered = [row for row in self.rows if q.lower() in str(row).lower()]
-        return AuditQueryResponse(rows=[AuditQueryRow(fields=row) for row in filtered[:limit]])
+    def query(
+        self,
+        q: str,
+        limit: int,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> AuditQueryResponse:
+        start = decode_cursor(cursor)[1] + 1 if cursor else 0
+        filtered = [
+            (index, row)
+            for index, row in enumerate(self.rows)
+            if index >= start
+            and q.lower() in str(row).lower()
+            and all(row.get(name) == value for name, value in (filters or {}).items())
+            and (since is None or event_time(row, float("-inf")) >= since)
+            and (until is None or event_time(row, float("inf")) < until)
+        ]
+        page = filtered[:limit]
+        next_cursor = encode_cursor(("", page[-1][0])) if page and len(filtered) > limit else None
+        return _audit_response((row for _, row in page), next_cursor)
+
+    def probe(self) -> None:
+        pass
+
+
+@dataclass
+class ColumnarAuditAdapter:
+    rows: InitVar[Iterable[Mapping[str, Any]]] = ()
+    store: AuditStore | AuditLog = field(default_factory=AuditStore)
+
+    def __post_init__(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        self.store.extend(rows)
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        self.store.append(row)
+
+    def query(
+        self,
+        q: str,
+        limit: int,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> AuditQueryResponse:
+        # One row past the page tells whether a next page exists.
+        page = list(
+            itertools.islice(self._scan(q, filters, since, until, cursor), max(limit, 0) + 1)
+        )
+        next_cursor = encode_cursor(page[limit - 1][0]) if limit > 0 and len(page) > limit else None
+        return _audit_response((row for _, row in page[:limit]), next_cursor)
+
+    def probe(self) -> None:
+        if isinstance(self.store, AuditLog):
+            self.store.check()
+
+    def stream(
+        self,
+        q: str,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> Iterator[tuple[dict[str, Any], str]]:
+        for position, row in self._scan(q, filters, since, until, cursor):
+            yield row, encode_cursor(position)
+
+    def _scan(
+        self,
+        q: str,
+        filters: Mapping[str, Any] | None,
+        since: float | None,
+        until: float | None,
+        cursor: str | None,
+    ) -> Iterator[tuple[Any, dict[str, Any]]]:
+        query = AuditFilter(q=q, equals=filters or {}, since=since, until=until)
+        return self.store.scan(query, decode_cursor(cursor) if cursor else None)
+
+
+def _audit_response(
+    rows: Iterable[Mapping[str, Any]], next_cursor: str | None
+) -> AuditQueryResponse:
+    # One pydantic-core validation for the whole page; building an
+    # AuditQueryRow per row costs about twice as much.
+    return AuditQueryResponse.model_validate(
+        {"rows": [{"fields": row} for row in rows], "next_cursor": next_cursor}
+    )
 
 
-def default_kb_adapter() -> InMemoryKBAdapter:
+def default_kb_adapter(segment_paths: Sequence[str] = ()) -> IndexedKBAdapter:
     docs = {
         "intro": DocumentResource(
             metadata=DocumentMetadata(id="intro", title="Welcome", tags=["intro"]),
             content="Welcome to the MCP control plane knowledge base.",
         )
     }
-    return InMemoryKBAdapter(documents=docs)
+    return IndexedKBAdapter(documents=docs, segment_paths=segment_paths)
 
 
-def default_audit_adapter() -> InMemoryAuditAdapter:
-    return InMemoryAuditAdapter(rows=[{"event": "startup", "status": "ok"}])
+def default_audit_adapter(directory: str | None = None) -> ColumnarAuditAdapter:
+    store = AuditLog(directory) if directory else AuditStore()
+    return ColumnarAuditAdapter(rows=[{"event": "startup", "status": "ok"}], store=store)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+from mcp_cp.telemetry import admission_in_flight, admission_limit, shed_requests
+
+DEFAULT_MAX_IN_FLIGHT = 256
+DEFAULT_EXEMPT_TOOLS = frozenset({"health.check"})
+OVERLOAD_RETRY_AFTER_S = 1.0
+
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[float, float]]:
+    # "read=100:200,audit=5" -> rate per second and burst (defaults to rate)
+    limits: dict[str, tuple[float, float]] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition(":")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    burst: float
+    tokens: float = field(init=False)
+    updated: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        # Returns 0 when a token was taken, else the seconds until one is due.
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else OVERLOAD_RETRY_AFTER_S
+
+
+@dataclass
+class AdaptiveLimit:
+    # AIMD on a smoothed latency: grow by about one slot per `limit` fast
+    # completions, shrink by 10% (at most once per cooldown) while the
+    # smoothed latency is above target.
+    limit: float
+    target_ms: float
+    min_limit: float = 1.0
+    max_limit: float = float(DEFAULT_MAX_IN_FLIGHT)
+    cooldown_s: float = 1.0
+    smoothing: float = 0.1
+    latency_ms: float = 0.0
+    decreased_at: float = float("-inf")
+
+    def observe(self, latency_ms: float) -> None:
+        self.latency_ms += self.smoothing * (latency_ms - self.latency_ms)
+        if self.latency_ms > self.target_ms:
+            now = time.monotonic()
+            if now - self.decreased_at >= self.cooldown_s:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+                self.decreased_at = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+@dataclass(frozen=True)
+class Rejection:
+    status: int
+    message: str
+    retry_after_s: float
+
+
+class AdmissionController:
+    # Decides, before any work is done, whether a call runs now. Rate limits
+    # come first (429), then the global in-flight limit (503). Exempt tools
+    # bypass both so health checks stay responsive while others shed. Used
+    # from the event loop only.
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        scope_rates: Mapping[str, tuple[float, float]] | None = None,
+        tool_rates: Mapping[str, tuple[float, float]] | None = None,
+        target_latency_ms: float | None = None,
+        exempt_tools: frozenset[str] = DEFAULT_EXEMPT_TOOLS,
+    ) -> None:
+        self.exempt_tools = exempt_tools
+        self.in_flight = 0
+        self._scopes = {name: TokenBucket(*rate) for name, rate in (scope_rates or {}).items()}
+        self._tools = {name: TokenBucket(*rate) for name, rate in (tool_rates or {}).items()}
+        self.limit = AdaptiveLimit(
+            limit=float(max_in_flight),
+            target_ms=target_latency_ms or 0.0,
+            max_limit=float(max_in_flight),
+        )
+        self.adaptive = bool(target_latency_ms)
+        admission_limit.set(max_in_flight)
+
+    def admit(self, scope: str, tool: str) -> Rejection | None:
+        if tool in self.exempt_tools:
+            return None
+        for bucket in (self._scopes.get(scope), self._tools.get(tool)):
+            if bucket is None:
+                continue
+            wait = bucket.take()
+            if wait:
+                shed_requests.labels(tool=tool, reason="rate_limited").inc()
+                return Rejection(429, "rate_limited", wait)
+        if self.in_flight >= int(self.limit.limit):
+            shed_requests.labels(tool=tool, reason="overloaded").inc()
+            return Rejection(503, "overloaded", OVERLOAD_RETRY_AFTER_S)
+        self.in_flight += 1
+        admission_in_flight.inc()
+        return None
+
+    def release(self, tool: str, latency_ms: float) -> None:
+        if tool in self.exempt_tools:
+            return
+        self.in_flight -= 1
+        admission_in_flight.dec()
+        if self.adaptive:
+            self.limit.observe(latency_ms)
+            admission_limit.set(int(self.limit.limit))
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any
+
+from mcp_cp.audit_store import (
+    PARTITION_SECONDS,
+    AuditFilter,
+    Partition,
+    RowPosition,
+    event_time,
+    scan_partition,
+)
+
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+MAX_PENDING_ROWS = 100_000
+RESIDENT_SEGMENTS = 4
+MANIFEST = "manifest.json"
+
+
+@dataclass
+class SegmentInfo:
+    name: str
+    min_ts: float
+    max_ts: float
+    rows: int
+
+
+class AuditLog:
+    # Append-only audit log. Rows are queued by ``append`` and written by one
+    # background thread as JSON lines ``[ts, row]`` to the active segment file.
+    # Each write batch is everything queued while the previous fsync ran, so
+    # concurrent appenders share one fsync (group commit). Sealed segments are
+    # listed in a manifest with their time range; only the active segment and
+    # a small LRU of sealed ones are held in memory as columnar partitions.
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        segment_max_seconds: float = PARTITION_SECONDS,
+        resident_segments: int = RESIDENT_SEGMENTS,
+        max_pending_rows: int = MAX_PENDING_ROWS,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.resident_segments = resident_segments
+        self.max_pending_rows = max_pending_rows
+        self._cond = threading.Condition()
+        self._pending: list[tuple[float, Mapping[str, Any]]] = []
+        self._appended = 0
+        self._durable = 0
+        self._closed = False
+        self._error: OSError | None = None
+        self._resident: OrderedDict[str, Partition] = OrderedDict()
+        self._resident_lock = threading.Lock()
+        self._sealed = self._recover()
+        self._next_segment = 1 + max((int(i.name[6:14]) for i in self._sealed), default=-1)
+        self._open_segment()
+        self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, row: Mapping[str, Any], durable: bool = False) -> None:
+        self.extend([row], durable=durable)
+
+    def extend(self, rows: Iterable[Mapping[str, Any]], durable: bool = False) -> None:
+        now = time.time()
+        batch = [(event_time(row, now), row) for row in rows]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("audit log is closed")
+            # Backpressure instead of unbounded queue growth when disk falls behind.
+            self._cond.wait_for(
+                lambda: len(self._pending) < self.max_pending_rows or self._error is not None
+            )
+            # Rows accepted after the writer stopped would never be written.
+            if self._error is not None:
+                raise self._error
+            self._pending.extend(batch)
+            self._appended += len(batch)
+            sequence = self._appended
+            self._cond.notify_all()
+            if durable:
+                self._wait_durable(sequence)
+
+    def flush(self) -> None:
+        with self._cond:
+            self._wait_durable(self._appended)
+
+    def _wait_durable(self, sequence: int) -> None:
+        self._cond.wait_for(lambda: self._durable >= sequence or self._error is not None)
+        if self._error is not None:
+            raise self._error
+
+    def check(self) -> None:
+        # Raises the error that stopped the writer, if any; appends are no
+        # longer persisted after it.
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._file.close()
+
+    def segments(self) -> list[SegmentInfo]:
+        return self._state[0]
+
+    def scan(
+        self, query: AuditFilter, after: RowPosition | None = None
+    ) -> Iterator[tuple[RowPosition, dict[str, Any]]]:
+        # Sealed list and active partition are published together, so a
+        # rotation mid-query can neither drop nor duplicate a segment. Segment
+        # names sort in write order and keep their name once sealed, which
+        # makes them stable cursor keys.
+        sealed, active, active_name = self._state
+        for info in sealed:
+            if after is not None and info.name < after[0]:
+                continue
+            if query.since is not None and info.max_ts < query.since:
+                continue
+            if query.until is not None and info.min_ts >= query.until:
+                continue
+            yield from scan_partition(self._load(info.name), info.name, query, after)
+        yield from scan_partition(active, active_name, query, after)
+
+    def query(self, query: AuditFilter, limit: int) -> list[dict[str, Any]]:
+        return [row for _, row in itertools.islice(self.scan(query), max(limit, 0))]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                batch, self._pending = self._pending, []
+                sequence = self._appended
+                closing = self._closed
+                self._cond.notify_all()
+            try:
+                if batch:
+                    self._write(batch)
+            except OSError as exc:
+                with self._cond:
+                    self._error = exc
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = sequence
+                self._cond.notify_all()
+            if closing and not batch:
+                return
+
+    def _write(self, batch: list[tuple[float, Mapping[str, Any]]]) -> None:
+        payload = "".join(
+            json.dumps([ts, row], separators=(",", ":"), default=str) + "\n" for ts, row in batch
+        ).encode("utf-8")
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._bytes += len(payload)
+        for ts, row in batch:
+            self._active.append(row, ts)
+        if self._bytes >= self.segment_max_bytes or (
+            time.monotonic() - self._opened_at >= self.segment_max_seconds
+        ):
+            self._seal()
+            self._open_segment()
+
+    def _open_segment(self) -> None:
+        self._name = f"audit-{self._next_segment:08d}.log"
+        self._next_segment += 1
+        self._file: IO[bytes] = (self.directory / self._name).open("ab")
+        self._bytes = 0
+        self._opened_at = time.monotonic()
+        self._active = Partition(start=time.time())
+        self._state = (self._sealed, self._active, self._name)
+
+    def _seal(self) -> None:
+        self._file.close()
+        active = self._active
+        info = SegmentInfo(self._name, active.min_ts, active.max_ts, active.row_count)
+        self._remember(self._name, active)
+        self._sealed = [*self._sealed, info]
+        self._write_manifest()
+
+    def _recover(self) -> list[SegmentInfo]:
+        manifest = self.directory / MANIFEST
+        sealed: list[SegmentInfo] = []
+        if manifest.exists():
+            sealed = [SegmentInfo(**entry) for entry in json.loads(manifest.read_text())]
+        known = {info.name for info in sealed}
+        # Segments that were active when the process stopped are sealed as-is.
+        for path in sorted(self.directory.glob("audit-*.log")):
+            if path.name in known:
+                continue
+            partition = self._read_segment(path)
+            if partition.row_count:
+                sealed.append(
+                    SegmentInfo(path.name, partition.min_ts, partition.max_ts, partition.row_count)
+                )
+            else:
+                path.unlink()
+        self._sealed = sealed
+        self._write_manifest()
+        return sealed
+
+    def _write_manifest(self) -> None:
+        tmp_path = self.directory / f"{MANIFEST}.tmp"
+        tmp_path.write_text(json.dumps([asdict(info) for info in self._sealed]))
+        tmp_path.replace(self.directory / MANIFEST)
+
+    def _load(self, name: str) -> Partition:
+        with self._resident_lock:
+            partition = self._resident.get(name)
+            if partition is not None:
+                self._resident.move_to_end(name)
+                return partition
+        partition = self._read_segment(self.directory / name)
+        self._remember(name, partition)
+        return partition
+
+    def _remember(self, name: str, partition: Partition) -> None:
+        with self._resident_lock:
+            self._resident[name] = partition
+            self._resident.move_to_end(name)
+            while len(self._resident) > self.resident_segments:
+                self._resident.popitem(last=False)
+
+    @staticmethod
+    def _read_segment(path: Path) -> Partition:
+        partition = Partition(start=0.0)
+        with path.open("rb") as handle:
+            for line in handle:
+                try:
+                    ts, row = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write.
+                    continue
+                partition.append(row, ts)
+        partition.start = partition.min_ts
+        return partition
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import itertools
+import json
+import threading
+import time
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+TIMESTAMP_FIELD = "timestamp"
+PARTITION_SECONDS = 3600
+MISSING = -1
+
+# Position of a row: the key of its partition (ascending in scan order) and
+# its index within the partition. Scans resume strictly after a position.
+RowPosition = tuple[Any, int]
+
+
+def encode_cursor(position: RowPosition) -> str:
+    raw = json.dumps(list(position), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> RowPosition:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, index = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(key, str | int | float) or not isinstance(index, int):
+        raise ValueError("invalid cursor")
+    return key, index
+
+
+def event_time(row: Mapping[str, Any], default: float) -> float:
+    value = row.get(TIMESTAMP_FIELD)
+    if isinstance(value, bool):
+        return default
+    if isinstance(value, int | float):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return default
+    return default
+
+
+def _intern_key(value: Any) -> Any:
+    # 1, 1.0 and True hash equal, so the type is part of the key; unhashable
+    # JSON values are keyed by their canonical encoding.
+    if value is None or isinstance(value, str | int | float | bool):
+        return type(value), value
+    return "json", json.dumps(value, sort_keys=True, default=str)
+
+
+@dataclass
+class AuditFilter:
+    q: str = ""
+    equals: Mapping[str, Any] = field(default_factory=dict)
+    since: float | None = None
+    until: float | None = None
+
+
+@dataclass
+class Partition:
+    start: float
+    min_ts: float = float("inf")
+    max_ts: float = float("-inf")
+    row_count: int = 0
+    timestamps: array[float] = field(default_factory=lambda: array("d"))
+    # Per field: one interned value id per row (MISSING when absent), plus the
+    # dictionary mapping ids back to values.
+    columns: dict[str, array[int]] = field(default_factory=dict)
+    dictionaries: dict[str, dict[Any, int]] = field(default_factory=dict)
+    values: dict[str, list[Any]] = field(default_factory=dict)
+
+    def append(self, row: Mapping[str, Any], ts: float) -> None:
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                self.dictionaries[name] = {}
+                self.values[name] = []
+                column = array("i", [MISSING]) * self.row_count
+            dictionary = self.dictionaries[name]
+            key = _intern_key(value)
+            value_id = dictionary.get(key)
+            if value_id is None:
+                value_id = dictionary[key] = len(self.values[name])
+                self.values[name].append(value)
+            column.append(value_id)
+            # Publish new columns only once they cover every row.
+            self.columns.setdefault(name, column)
+        for column in self.columns.values():
+            if len(column) == self.row_count:
+                column.append(MISSING)
+        self.timestamps.append(ts)
+        self.min_ts = min(self.min_ts, ts)
+        self.max_ts = max(self.max_ts, ts)
+        self.row_count += 1
+
+    def row(self, index: int) -> dict[str, Any]:
+        return {
+            name: self.values[name][column[index]]
+            for name, column in list(self.columns.items())
+            if column[index] != MISSING
+        }
+
+    def scan(self, query: AuditFilter, start: int = 0) -> Iterator[int]:
+        row_count = self.row_count
+        if row_count <= start or not self._overlaps(query.since, query.until):
+            return
+        required: list[tuple[array[int], int]] = []
+        for name, value in query.equals.items():
+            column = self.columns.get(name)
+            value_id = self.dictionaries.get(name, {}).get(_intern_key(value))
+            if column is None or value_id is None:
+                return
+            required.append((column, value_id))
+        text = self._text_matches(query.q) if query.q else None
+        if text is not None and not text:
+            return
+        check_time = self._needs_time_check(query.since, query.until)
+        for index in range(start, row_count):
+            if check_time and not _within(self.timestamps[index], query.since, query.until):
+                continue
+            if any(column[index] != value_id for column, value_id in required):
+                continue
+            if text is not None and not any(
+                column[index] in ids for column, ids in text if column[index] != MISSING
+            ):
+                continue
+            yield index
+
+    def _overlaps(self, since: float | None, until: float | None) -> bool:
+        return (since is None or self.max_ts >= since) and (until is None or self.min_ts < until)
+
+    def _needs_time_check(self, since: float | None, until: float | None) -> bool:
+        return (since is not None and self.min_ts < since) or (
+            until is not None and self.max_ts >= until
+        )
+
+    def _text_matches(self, q: str) -> list[tuple[array[int], set[int]]]:
+        # Free text is matched against the dictionaries, not the rows: each
+        # distinct value is lowercased once per query. A field whose name
+        # matches accepts every value it holds.
+        needle = q.lower()
+        matches = []
+        for name, column in list(self.columns.items()):
+            values = self.values[name]
+            if needle in name.lower():
+                ids = set(range(len(values)))
+            else:
+                ids = {i for i, value in enumerate(values) if needle in str(value).lower()}
+            if ids:
+                matches.append((column, ids))
+        return matches
+
+
+def _within(ts: float, since: float | None, until: float | None) -> bool:
+    return (since is None or ts >= since) and (until is None or ts < until)
+
+
+class AuditStore:
+    def __init__(self, partition_seconds: float = PARTITION_SECONDS) -> None:
+        self.partition_seconds = partition_seconds
+        self._partitions: dict[float, Partition] = {}
+        self._order: list[Partition] = []
+        self._lock = threading.Lock()
+
+    def append(self, row: Mapping[str, Any], ts: float | None = None) -> None:
+        ts = event_time(row, time.time()) if ts is None else ts
+        start = ts - ts % self.partition_seconds
+        with self._lock:
+            partition = self._partitions.get(start)
+            if partition is None:
+                partition = self._partitions[start] = Partition(start=start)
+                self._order = sorted([*self._order, partition], key=lambda p: p.start)
+            partition.append(row, ts)
+
+    def extend(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def partitions(self) -> list[Partition]:
+        return self._order
+
+    def scan(
+        self, query: AuditFilter, after: RowPosition | None = None
+    ) -> Iterator[tuple[RowPosition, dict[str, Any]]]:
+        for partition in self.partitions():
+            yield from scan_partition(partition, partition.start, query, after)
+
+    def query(self, query: AuditFilter, limit: int) -> list[dict[str, Any]]:
+        return [row for _, row in itertools.islice(self.scan(query), max(limit, 0))]
+
+
+def scan_partition(
+    partition: Partition, key: Any, query: AuditFilter, after: RowPosition | None
+) -> Iterator[tuple[RowPosition, dict[str, Any]]]:
+    start = 0
+    if after is not None:
+        if isinstance(key, str) != isinstance(after[0], str):
+            raise ValueError("cursor does not belong to this audit store")
+        if key < after[0]:
+            return
+        if key == after[0]:
+            start = after[1] + 1
+    for index in partition.scan(query, start):
+        yield (key, index), partition.row(index)
@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any
+
+from mcp_cp.audit_log import AuditLog
+from mcp_cp.logging import configure_logging, stop_logging
+from mcp_cp.models import DocumentMetadata, DocumentResource
+from mcp_cp.segments import write_segment
+
+TOOLS = ("health.check", "kb.search", "kb.resource", "audit.query")
+TRANSPORTS = ("http", "stdio")
+SEGMENT_DOCS = 1_000_000
+AUDIT_BATCH_ROWS = 100_000
+DOC_WORDS = 60
+VOCABULARY_SIZE = 5_000
+AUDIT_EVENTS = ("tool_call", "login", "policy_denied", "config_change", "deploy")
+CORPUS_MANIFEST = "bench-corpus.json"
+BENCH_TOKEN = "bench"
+STDIO_LINE_LIMIT = 16 * 1024 * 1024
+_SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "po", "qu", "di")
+
+
+@dataclass(frozen=True)
+class Corpus:
+    directory: str
+    docs: int
+    audit_rows: int
+    seed: int
+    segment_paths: list[str]
+    audit_dir: str
+    vocabulary: list[str]
+
+
+@dataclass
+class ToolResult:
+    transport: str
+    tool: str
+    requests: int
+    errors: int
+    seconds: float
+    throughput_rps: float
+    p50_ms: float
+    p99_ms: float
+    p999_ms: float
+    max_rss_kb: int
+
+
+def vocabulary(size: int = VOCABULARY_SIZE) -> list[str]:
+    words = []
+    for n in range(size):
+        word = ""
+        while True:
+            n, digit = divmod(n, len(_SYLLABLES))
+            word += _SYLLABLES[digit]
+            if n == 0:
+                break
+        words.append(word)
+    return words
+
+
+def _zipf_weights(size: int) -> list[float]:
+    # Cumulative 1/rank weights: a few terms are common, most are rare.
+    return list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+
+
+def _documents(
+    ids: range, words: list[str], weights: list[float], rng: random.Random
+) -> Iterator[DocumentResource]:
+    for i in ids:
+        text = rng.choices(words, cum_weights=weights, k=DOC_WORDS)
+        yield DocumentResource(
+            metadata=DocumentMetadata(id=f"doc-{i}", title=" ".join(text[:6]), tags=text[:2]),
+            content=" ".join(text),
+        )
+
+
+def _audit_rows(
+    count: int, words: list[str], weights: list[float], rng: random.Random
+) -> Iterator[dict[str, Any]]:
+    start = time.time() - count
+    for i in range(count):
+        yield {
+            "timestamp": start + i,
+            "event": rng.choice(AUDIT_EVENTS),
+            "status": "error" if rng.random() < 0.05 else "ok",
+            "actor": f"agent-{rng.randrange(100)}",
+            "detail": " ".join(rng.choices(words, cum_weights=weights, k=4)),
+        }
+
+
+def build_corpus(
+    directory: str | os.PathLike[str], docs: int, audit_rows: int, seed: int
+) -> Corpus:
+    # Segments hold at most SEGMENT_DOCS documents each, so building a large
+    # corpus never needs more than one segment in memory. A corpus already
+    # built in `directory` with the same parameters is reused.
+    root = Path(directory)
+    manifest = root / CORPUS_MANIFEST
+    if manifest.exists():
+        corpus = Corpus(**json.loads(manifest.read_text()))
+        if (corpus.docs, corpus.audit_rows, corpus.seed) == (docs, audit_rows, seed):
+            return corpus
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    words = vocabulary()
+    weights = _zipf_weights(len(words))
+    segment_paths = []
+    for number, first in enumerate(range(0, docs, SEGMENT_DOCS)):
+        path = root / f"kb-{number:04d}.seg"
+        ids = range(first, min(first + SEGMENT_DOCS, docs))
+        write_segment(path, _documents(ids, words, weights, rng))
+        segment_paths.append(str(path))
+    audit_dir = root / "audit"
+    log = AuditLog(audit_dir)
+    try:
+        rows = _audit_rows(audit_rows, words, weights, rng)
+        while batch := list(itertools.islice(rows, AUDIT_BATCH_ROWS)):
+            log.extend(batch)
+        log.flush()
+    finally:
+        log.close()
+    corpus = Corpus(str(root), docs, audit_rows, seed, segment_paths, str(audit_dir), words)
+    manifest.write_text(json.dumps(asdict(corpus)))
+    return corpus
+
+
+def with_audit_copy(corpus: Corpus, directory: str | os.PathLike[str]) -> Corpus:
+    # The server appends to its audit log, so a reused corpus is served from
+    # a copy; every run then starts from the same rows.
+    audit_dir = shutil.copytree(corpus.audit_dir, Path(directory) / "audit")
+    return replace(corpus, audit_dir=str(audit_dir))
+
+
+def make_request(tool: str, corpus: Corpus, rng: random.Random) -> dict[str, Any]:
+    # Query terms are drawn from the head of the vocabulary so searches match.
+    common = corpus.vocabulary[:200]
+    if tool == "kb.resource":
+        doc_id = f"doc-{rng.randrange(corpus.docs)}" if corpus.docs else "intro"
+        return {"method": "resources/read", "params": {"uri": f"kb://documents/{doc_id}"}}
+    arguments: dict[str, Any] = {}
+    if tool == "kb.search":
+        arguments = {"query": " ".join(rng.sample(common, 2)), "top_k": 10}
+    elif tool == "audit.query":
+        arguments = {"q": rng.choice(common), "filters": {"status": "error"}, "limit": 50}
+    return {"method": "tools/call", "params": {"name": tool, "arguments": arguments}}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    # Nearest rank.
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+Call = Callable[[dict[str, Any]], Awaitable[bool]]
+
+
+async def drive(
+    call: Call, requests: Callable[[], dict[str, Any]], count: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    # Closed loop: `concurrency` clients each send their next request as soon
+    # as the previous one is answered.
+    latencies: list[float] = []
+    errors = 0
+    issued = itertools.count()
+
+    async def client() -> None:
+        nonlocal errors
+        while next(issued) < count:
+            payload = requests()
+            start = time.perf_counter()
+            ok = await call(payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+            # Lets other clients run when a call completes without suspending.
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_tools(
+    transport: str,
+    call: Call,
+    corpus: Corpus,
+    args: argparse.Namespace,
+    max_rss_kb: Callable[[], int],
+) -> list[ToolResult]:
+    rng = random.Random(args.seed)
+    results = []
+    for tool in args.tools:
+
+        def requests(tool: str = tool) -> dict[str, Any]:
+            return make_request(tool, corpus, rng)
+
+        await drive(call, requests, args.warmup, args.concurrency)
+        latencies, errors, seconds = await drive(call, requests, args.requests, args.concurrency)
+        latencies.sort()
+        results.append(
+            ToolResult(
+                transport=transport,
+                tool=tool,
+                requests=len(latencies),
+                errors=errors,
+                seconds=round(seconds, 6),
+                throughput_rps=round(len(latencies) / seconds, 2) if seconds else 0.0,
+                p50_ms=round(percentile(latencies, 0.5), 4),
+                p99_ms=round(percentile(latencies, 0.99), 4),
+                p999_ms=round(percentile(latencies, 0.999), 4),
+                max_rss_kb=max_rss_kb(),
+            )
+        )
+    return results
+
+
+def _server_env(corpus: Corpus, args: argparse.Namespace) -> dict[str, str]:
+    return {
+        "MCP_KB_SEGMENTS": os.pathsep.join(corpus.segment_paths),
+        "MCP_AUDIT_DIR": corpus.audit_dir,
+        "MCP_CACHE_MAX_ENTRIES": str(args.cache_entries),
+        "MCP_TRACE_MODE": "otlp" if args.trace else "metrics",
+        "MCP_METRICS_PORT": "0",
+        "MCP_BEARER_TOKEN": BENCH_TOKEN,
+    }
+
+
+def _succeeded(message: dict[str, Any]) -> bool:
+    result = message.get("result")
+    return "error" not in message and not (isinstance(result, dict) and result.get("isError"))
+
+
+async def bench_http(corpus: Corpus, args: argparse.Namespace) -> list[ToolResult]:
+    # The ASGI app is driven in-process through httpx's ASGI transport: the
+    # full middleware and MCP stack without sockets.
+    import httpx
+
+    from mcp_cp.policy import ScopePolicy
+    from mcp_cp.server import build_server, create_http_app
+    from mcp_cp.telemetry import configure_tracing
+
+    os.environ.update(_server_env(corpus, args))
+    configure_tracing(mode=os.environ["MCP_TRACE_MODE"])
+    server, streaming_audit, executor, probes = build_server()
+    app = create_http_app(
+        server,
+        token=BENCH_TOKEN,
+        policy=ScopePolicy(),
+        audit_adapter=streaming_audit,
+        executor=executor,
+    )
+    ids = itertools.count()
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    probes.start()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def call(payload: dict[str, Any]) -> bool:
+                tool = payload["params"].get("name", "kb.resource")
+                headers = {
+                    "Authorization": f"Bearer {BENCH_TOKEN}",
+                    "X-MCP-Scope": "audit" if tool == "audit.query" else "read",
+                }
+                body = {"jsonrpc": "2.0", "id": next(ids), **payload}
+                response = await client.post("/", headers=headers, json=body)
+                return response.status_code == 200 and _succeeded(response.json())
+
+            return await run_tools(
+                "http",
+                call,
+                corpus,
+                args,
+                lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            )
+    finally:
+        probes.stop()
+
+
+def _bench_http_process(corpus: Corpus, args: argparse.Namespace) -> list[ToolResult]:
+    # Runs in a freshly spawned process, so its memory high-water mark is
+    # the server's and not that of the corpus build in the parent.
+    with open(os.devnull, "w") as devnull:
+        # Logs are formatted and written as in production, just not kept.
+        configure_logging(stream=devnull)
+        try:
+            return asyncio.run(bench_http(corpus, args))
+        finally:
+            stop_logging()
+
+
+async def bench_stdio(corpus: Corpus, args: argparse.Namespace) -> list[ToolResult]:
+    # One server subprocess speaking newline-delimited JSON-RPC on stdio.
+    # Its memory high-water mark is read once it has exited.
+    env = {**os.environ, **_server_env(corpus, args), "MCP_MODE": "stdio"}
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "mcp_cp.server",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=env,
+        limit=STDIO_LINE_LIMIT,
+    )
+    assert process.stdin is not None and process.stdout is not None
+    stdin, stdout = process.stdin, process.stdout
+    loop = asyncio.get_running_loop()
+    pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+    ids = itertools.count()
+
+    async def read() -> None:
+        async for line in stdout:
+            message = json.loads(line)
+            future = pending.pop(message.get("id", -1), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+        for future in pending.values():
+            future.set_exception(ConnectionError("stdio server exited"))
+
+    async def call(payload: dict[str, Any]) -> bool:
+        request_id = next(ids)
+        future = pending[request_id] = loop.create_future()
+        stdin.write(json.dumps({"jsonrpc": "2.0", "id": request_id, **payload}).encode() + b"\n")
+        await stdin.drain()
+        return _succeeded(await future)
+
+    reader = asyncio.create_task(read())
+    try:
+        await call(
+            {
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "mcp-cp-bench", "version": "0"},
+                },
+            }
+        )
+        stdin.write(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n')
+        results = await run_tools("stdio", call, corpus, args, lambda: 0)
+    finally:
+        stdin.close()
+        await process.wait()
+        reader.cancel()
+    max_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    for result in results:
+        result.max_rss_kb = max_rss_kb
+    return results
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], max_regression: float) -> list[str]:
+    # Returns one line per tool whose p99 or throughput got worse by more
+    # than `max_regression` (a fraction) relative to the baseline report.
+    before = {(r["transport"], r["tool"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["transport"], result["tool"]))
+        if old is None:
+            continue
+        name = f"{result['transport']} {result['tool']}"
+        if old["p99_ms"] and result["p99_ms"] > old["p99_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p99 {old['p99_ms']}ms -> {result['p99_ms']}ms")
+        if result["throughput_rps"] < old["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {old['throughput_rps']}/s -> {result['throughput_rps']}/s"
+            )
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m mcp_cp.bench")
+    parser.add_argument("--docs", type=int, default=1_000)
+    parser.add_argument("--audit-rows", type=int, default=1_000)
+    parser.add_argument("--requests", type=int, default=2_000, help="measured calls per tool")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--transports", default=",".join(TRANSPORTS))
+    parser.add_argument("--tools", default=",".join(TOOLS))
+    parser.add_argument("--cache-entries", type=int, default=0)
+    parser.add_argument("--trace", action="store_true", help="export spans over OTLP")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--corpus-dir", help="build or reuse the corpus here")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    args.transports = [t for t in args.transports.split(",") if t]
+    args.tools = [t for t in args.tools.split(",") if t]
+    for name in args.transports:
+        if name not in TRANSPORTS:
+            parser.error(f"unknown transport {name!r}")
+    for name in args.tools:
+        if name not in TOOLS:
+            parser.error(f"unknown tool {name!r}")
+    return args
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    # python -m mcp_cp.bench --docs 100000 --audit-rows 1000000 --output bench.json
+    args = _parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="mcp-bench-") as scratch:
+        started = time.perf_counter()
+        corpus = build_corpus(args.corpus_dir or scratch, args.docs, args.audit_rows, args.seed)
+        build_s = time.perf_counter() - started
+        if args.corpus_dir:
+            corpus = with_audit_copy(corpus, scratch)
+        corpus_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results: list[ToolResult] = []
+        # stdio first: its memory is read from RUSAGE_CHILDREN, which would
+        # also cover the HTTP child once that has run.
+        if "stdio" in args.transports:
+            results += asyncio.run(bench_stdio(corpus, args))
+        if "http" in args.transports:
+            spawn = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                results += pool.submit(_bench_http_process, corpus, args).result()
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "baseline", "corpus_dir")
+        },
+        "corpus": {
+            "docs": args.docs,
+            "audit_rows": args.audit_rows,
+            "build_s": round(build_s, 3),
+            "max_rss_kb": corpus_rss_kb,
+        },
+        "results": [asdict(result) for result in results],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    for result in results:
+        print(
+            f"{result.transport:6} {result.tool:13} {result.throughput_rps:>10.1f}/s"
+            f"  p50 {result.p50_ms:.3f}ms  p99 {result.p99_ms:.3f}ms"
+            f"  p999 {result.p999_ms:.3f}ms  errors {result.errors}",
+            file=sys.stderr,
+        )
+    if args.baseline:
+        regressions = compare(
+            json.loads(Path(args.baseline).read_text()), report, args.max_regression
+        )
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Protocol
+
+from mcp_cp.telemetry import cache_evictions, cache_hits, cache_misses
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+CacheKey = tuple[Hashable, ...]
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_S = 30.0
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class ResponseCache(Protocol):
+    # Keys start with the tool name. Values are tool results as models, which
+    # callers dump on every hit, so no two callers share a mutable payload.
+    def get(self, key: CacheKey) -> BaseModel | None: ...
+
+    def generation(self) -> int: ...
+
+    def set(self, key: CacheKey, value: BaseModel, generation: int) -> None: ...
+
+    def invalidate(self, key: CacheKey) -> None: ...
+
+    def invalidate_tool(self, tool: str) -> None: ...
+
+
+class TTLCache:
+    # Size-bounded LRU whose entries also expire after ttl_s. Each tool has an
+    # epoch: invalidate_tool bumps it, which makes every entry stored under an
+    # older epoch stale in O(1). Any invalidation also bumps the generation;
+    # set() takes the generation read before the result was computed, so a
+    # result racing an invalidation is never stored.
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_s: float = DEFAULT_TTL_S
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[CacheKey, tuple[float, int, BaseModel]] = OrderedDict()
+        self._epochs: dict[str, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> BaseModel | None:
+        tool = str(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, epoch, value = entry
+                if epoch != self._epochs.get(tool, 0):
+                    del self._entries[key]
+                    cache_evictions.labels(tool=tool, reason="invalidated").inc()
+                elif expires_at <= time.monotonic():
+                    del self._entries[key]
+                    cache_evictions.labels(tool=tool, reason="expired").inc()
+                else:
+                    self._entries.move_to_end(key)
+                    cache_hits.labels(tool=tool).inc()
+                    return value
+        cache_misses.labels(tool=tool).inc()
+        return None
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(self, key: CacheKey, value: BaseModel, generation: int) -> None:
+        tool = str(key[0])
+        with self._lock:
+            if generation != self._generation:
+                return
+            epoch = self._epochs.get(tool, 0)
+            self._entries[key] = (time.monotonic() + self.ttl_s, epoch, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                cache_evictions.labels(tool=str(evicted[0]), reason="size").inc()
+
+    def invalidate(self, key: CacheKey) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                cache_evictions.labels(tool=str(key[0]), reason="invalidated").inc()
+
+    def invalidate_tool(self, tool: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._epochs[tool] = self._epochs.get(tool, 0) + 1
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import time
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar, cast
+
+from mcp_cp.telemetry import (
+    coalesced_calls,
+    executor_active,
+    executor_queue_depth,
+    record_stage,
+)
+
+T = TypeVar("T")
+
+DEFAULT_WORKERS = 8
+
+
+def parse_tool_limits(spec: str) -> dict[str, int]:
+    # "kb.search=4,audit.query=2"
+    limits: dict[str, int] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        tool, _, limit = item.partition("=")
+        limits[tool.strip()] = int(limit)
+    return limits
+
+
+class ToolExecutor:
+    # Runs tool work off the event loop. Synchronous callables go to a bounded
+    # pool; coroutine functions are awaited on the loop. Each tool has its own
+    # concurrency limit, so one slow tool cannot take every worker, and the
+    # pool itself is never handed more calls than it has workers: anything
+    # beyond that waits here, where it is visible as queue depth.
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_WORKERS,
+        tool_limits: Mapping[str, int] | None = None,
+        default_limit: int | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.tool_limits = dict(tool_limits or {})
+        self.default_limit = default_limit or max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-tool")
+        self._workers = asyncio.Semaphore(max_workers)
+        self._tools: dict[str, asyncio.Semaphore] = {}
+
+    async def run(self, tool: str, fn: Callable[..., T | Awaitable[T]], *args: Any) -> T:
+        started = time.perf_counter()
+        queued = executor_queue_depth.labels(tool=tool)
+        queued.inc()
+        dequeued = False
+        try:
+            async with self._semaphore(tool):
+                if inspect.iscoroutinefunction(fn):
+                    queued.dec()
+                    dequeued = True
+                    record_stage("executor_wait", started)
+                    with executor_active.labels(tool=tool).track_inprogress():
+                        return cast(T, await fn(*args))
+                async with self._workers:
+                    queued.dec()
+                    dequeued = True
+                    record_stage("executor_wait", started)
+                    with executor_active.labels(tool=tool).track_inprogress():
+                        return await self._submit(fn, *args)
+        finally:
+            if not dequeued:
+                queued.dec()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        semaphore = self._tools.get(tool)
+        if semaphore is None:
+            limit = self.tool_limits.get(tool, self.default_limit)
+            semaphore = self._tools[tool] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        # Threads keep the caller's context so spans and log fields nest.
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args)
+        return cast(T, await loop.run_in_executor(self._pool, call))
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution. Keys start with
+    # the tool name. The shared call runs as its own task, so a caller that is
+    # cancelled does not cancel it for the others.
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task[Any]] = {}
+
+    async def do(self, key: tuple[Hashable, ...], call: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            coalesced_calls.labels(tool=str(key[0])).inc()
+        return cast(T, await asyncio.shield(task))
+
+    def _done(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so it is not reported when every caller left.
+        if not task.cancelled():
+            task.exception()
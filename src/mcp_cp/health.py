@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from mcp_cp.telemetry import record_probe
+
+DEFAULT_PROBE_INTERVAL_S = 10.0
+DEFAULT_PROBE_TIMEOUT_S = 2.0
+
+# Sync or async callables that raise when their dependency is unhealthy.
+Probe = Callable[[], Any]
+
+
+class DependencyProbes:
+    # Probes every dependency on a background task each `interval_s` and keeps
+    # the latest status ("ok", "error" or "timeout") in memory, so health
+    # checks never wait on a backend. The server starts the task when it
+    # starts serving; until the first round finishes, statuses are "unknown".
+    def __init__(
+        self,
+        probes: Mapping[str, Probe],
+        interval_s: float = DEFAULT_PROBE_INTERVAL_S,
+        timeout_s: float = DEFAULT_PROBE_TIMEOUT_S,
+    ) -> None:
+        self.probes = dict(probes)
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.statuses = dict.fromkeys(self.probes, "unknown")
+        self._task: asyncio.Task[None] | None = None
+        self._running: dict[str, asyncio.Future[Any]] = {}
+
+    def snapshot(self) -> dict[str, str]:
+        return dict(self.statuses)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def refresh(self) -> None:
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for running in list(self._running.values()):
+            running.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval_s)
+
+    async def _probe(self, name: str, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._call(name, probe)), self.timeout_s)
+            status = "ok"
+        except TimeoutError:
+            status = "timeout"
+        except Exception:
+            status = "error"
+        record_probe(name, status, started)
+        self.statuses[name] = status
+
+    def _call(self, name: str, probe: Probe) -> asyncio.Future[Any]:
+        # A probe that outlives its timeout keeps running and is waited on
+        # again next round instead of being started a second time; sync
+        # probes run on a thread, which cannot be interrupted.
+        running = self._running.get(name)
+        if running is None:
+            if inspect.iscoroutinefunction(probe):
+                running = asyncio.ensure_future(probe())
+            else:
+                running = asyncio.ensure_future(asyncio.to_thread(probe))
+            running.add_done_callback(lambda done: self._settle(name, done))
+            self._running[name] = running
+        return running
+
+    def _settle(self, name: str, done: asyncio.Future[Any]) -> None:
+        self._running.pop(name, None)
+        # Retrieved here so a probe that failed after its timeout is not
+        # reported as an unhandled exception.
+        if not done.cancelled():
+            done.exception()
@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import NamedTuple, Protocol
+
+from mcp_cp.models import DocumentResource
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Segments smaller than this absorb new upserts copy-on-write instead of
+# spawning another segment; compaction merges everything below it.
+TAIL_SEGMENT_DOCS = 256
+# Segments with at least this share of tombstoned docs are rewritten on compaction.
+COMPACT_DELETED_RATIO = 0.2
+# Content offsets kept per (term, doc); snippets only need the first few matches.
+MAX_TERM_POSITIONS = 16
+SNIPPET_WIDTH = 120
+SNIPPET_LEAD = 30
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Postings(NamedTuple):
+    docs: Sequence[int]
+    tfs: Sequence[int]
+    # Bounds over the whole list, used to cap a term's best possible BM25 score.
+    max_tf: int
+    min_length: int
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def analyze(doc: DocumentResource) -> tuple[int, dict[str, tuple[int, list[int]]]]:
+    # Returns the doc length in tokens and, per term, its frequency across title
+    # and content plus the character offsets of its first content occurrences.
+    terms: dict[str, tuple[int, list[int]]] = {}
+    length = 0
+    for term in tokenize(doc.metadata.title):
+        tf, offsets = terms.get(term, (0, []))
+        terms[term] = (tf + 1, offsets)
+        length += 1
+    for match in _TOKEN_RE.finditer(doc.content):
+        term = match.group().lower()
+        tf, offsets = terms.get(term, (0, []))
+        if len(offsets) < MAX_TERM_POSITIONS:
+            offsets.append(match.start())
+        terms[term] = (tf + 1, offsets)
+        length += 1
+    return length, terms
+
+
+class SegmentReader(Protocol):
+    @property
+    def total_length(self) -> int: ...
+
+    def __len__(self) -> int: ...
+
+    def postings(self, term: str) -> Postings | None: ...
+
+    def positions(self, term: str, ordinal: int) -> Sequence[int]: ...
+
+    def doc_length(self, ordinal: int) -> int: ...
+
+    def ordinal(self, doc_id: str) -> int | None: ...
+
+    def doc_id(self, ordinal: int) -> str: ...
+
+    def title(self, ordinal: int) -> str: ...
+
+    def content(self, ordinal: int) -> str: ...
+
+    def document(self, ordinal: int) -> DocumentResource: ...
+
+    # Offsets returned by ``positions`` index into the same units as this slice.
+    def content_slice(self, ordinal: int, start: int, end: int) -> str: ...
+
+
+# Per term: doc ordinals, term frequencies and content offsets, in ordinal order.
+TermEntry = tuple[list[int], list[int], list[list[int]]]
+
+
+@dataclass(frozen=True)
+class Segment:
+    documents: list[DocumentResource]
+    doc_lengths: list[int]
+    terms: dict[str, TermEntry]
+    bounds: dict[str, tuple[int, int]]
+    ordinals: dict[str, int]
+    total_length: int
+
+    @classmethod
+    def build(cls, documents: Iterable[DocumentResource]) -> Segment:
+        docs: list[DocumentResource] = []
+        doc_lengths: list[int] = []
+        terms: dict[str, TermEntry] = {}
+        ordinals: dict[str, int] = {}
+        for ordinal, doc in enumerate(documents):
+            length, analyzed = analyze(doc)
+            docs.append(doc)
+            doc_lengths.append(length)
+            ordinals[doc.metadata.id] = ordinal
+            for term, (tf, offsets) in analyzed.items():
+                doc_list, tf_list, offset_lists = terms.setdefault(term, ([], [], []))
+                doc_list.append(ordinal)
+                tf_list.append(tf)
+                offset_lists.append(offsets)
+        bounds = {
+            term: (max(tf_list), min(doc_lengths[o] for o in doc_list))
+            for term, (doc_list, tf_list, _) in terms.items()
+        }
+        return cls(docs, doc_lengths, terms, bounds, ordinals, sum(doc_lengths))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def postings(self, term: str) -> Postings | None:
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        return Postings(entry[0], entry[1], *self.bounds[term])
+
+    def positions(self, term: str, ordinal: int) -> Sequence[int]:
+        entry = self.terms.get(term)
+        if entry is None:
+            return ()
+        index = bisect.bisect_left(entry[0], ordinal)
+        if index == len(entry[0]) or entry[0][index] != ordinal:
+            return ()
+        return entry[2][index]
+
+    def doc_length(self, ordinal: int) -> int:
+        return self.doc_lengths[ordinal]
+
+    def ordinal(self, doc_id: str) -> int | None:
+        return self.ordinals.get(doc_id)
+
+    def doc_id(self, ordinal: int) -> str:
+        return self.documents[ordinal].metadata.id
+
+    def title(self, ordinal: int) -> str:
+        return self.documents[ordinal].metadata.title
+
+    def content(self, ordinal: int) -> str:
+        return self.documents[ordinal].content
+
+    def document(self, ordinal: int) -> DocumentResource:
+        return self.documents[ordinal]
+
+    def content_slice(self, ordinal: int, start: int, end: int) -> str:
+        return self.documents[ordinal].content[start:end]
+
+    def with_document(self, doc: DocumentResource) -> Segment:
+        # Copy-on-write: published segments are never mutated, only the postings
+        # lists touched by ``doc`` are copied.
+        ordinal = len(self.documents)
+        length, analyzed = analyze(doc)
+        terms = dict(self.terms)
+        bounds = dict(self.bounds)
+        for term, (tf, offsets) in analyzed.items():
+            doc_list, tf_list, offset_lists = terms.get(term, ([], [], []))
+            terms[term] = ([*doc_list, ordinal], [*tf_list, tf], [*offset_lists, offsets])
+            max_tf, min_length = bounds.get(term, (tf, length))
+            bounds[term] = (max(max_tf, tf), min(min_length, length))
+        return Segment(
+            documents=[*self.documents, doc],
+            doc_lengths=[*self.doc_lengths, length],
+            terms=terms,
+            bounds=bounds,
+            ordinals={**self.ordinals, doc.metadata.id: ordinal},
+            total_length=self.total_length + length,
+        )
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    segment: SegmentReader
+    ordinal: int
+    score: float
+    terms: frozenset[str]
+
+    def snippet(self, width: int = SNIPPET_WIDTH) -> str:
+        matches = sorted(
+            (offset, term)
+            for term in self.terms
+            for offset in self.segment.positions(term, self.ordinal)
+        )
+        if not matches:
+            return self.segment.content_slice(self.ordinal, 0, width)
+        # Slide a window over the stored offsets and keep the one covering the
+        # most distinct query terms; the document text itself is never scanned.
+        best_start, best_covered = matches[0][0], 0
+        low = 0
+        for high in range(len(matches)):
+            while matches[high][0] - matches[low][0] > width - SNIPPET_LEAD:
+                low += 1
+            covered = len({term for _, term in matches[low : high + 1]})
+            if covered > best_covered:
+                best_start, best_covered = matches[low][0], covered
+        start = max(best_start - SNIPPET_LEAD, 0)
+        text = self.segment.content_slice(self.ordinal, start, start + width)
+        return f"...{text}" if start else text
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    segments: tuple[SegmentReader, ...] = ()
+    deleted: tuple[frozenset[int], ...] = ()
+    doc_count: int = field(init=False)
+    total_length: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        live = sum(len(s) for s in self.segments) - sum(len(d) for d in self.deleted)
+        object.__setattr__(self, "doc_count", live)
+        object.__setattr__(self, "total_length", sum(s.total_length for s in self.segments))
+
+    def locate(self, doc_id: str) -> tuple[int, int] | None:
+        for position, segment in enumerate(self.segments):
+            ordinal = segment.ordinal(doc_id)
+            if ordinal is not None and ordinal not in self.deleted[position]:
+                return position, ordinal
+        return None
+
+    def get(self, doc_id: str) -> DocumentResource | None:
+        location = self.locate(doc_id)
+        if location is None:
+            return None
+        return self.segments[location[0]].document(location[1])
+
+    def search(self, query: str, top_k: int) -> list[SearchHit]:
+        if self.doc_count == 0 or top_k <= 0:
+            return []
+        terms = set(tokenize(query))
+        postings = [
+            {t: p for t in terms if (p := segment.postings(t)) is not None}
+            for segment in self.segments
+        ]
+        # Like Lucene's maxDoc, corpus statistics count tombstoned docs until
+        # compaction drops them, so document frequencies never exceed the doc count.
+        max_doc = sum(len(segment) for segment in self.segments)
+        doc_freqs = dict.fromkeys(terms, 0)
+        for segment_postings in postings:
+            for term, term_postings in segment_postings.items():
+                doc_freqs[term] += len(term_postings.docs)
+        idfs = {t: math.log(1 + (max_doc - df + 0.5) / (df + 0.5)) for t, df in doc_freqs.items()}
+        avg_length = self.total_length / max_doc or 1.0
+        # Min-heap of the best hits so far; ties go to the earlier (segment, ordinal).
+        heap: list[tuple[float, int, int]] = []
+        for position, segment in enumerate(self.segments):
+            _max_score(
+                segment,
+                position,
+                self.deleted[position],
+                [(idfs[t], p) for t, p in postings[position].items()],
+                avg_length,
+                top_k,
+                heap,
+            )
+        matched = frozenset(terms)
+        return [
+            SearchHit(self.segments[-p], -o, score, matched) for score, p, o in sorted(heap)[::-1]
+        ]
+
+
+def _term_score(idf: float, tf: int, length: int, avg_length: float) -> float:
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+    return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+
+def _max_score(
+    segment: SegmentReader,
+    position: int,
+    deleted: frozenset[int],
+    term_postings: list[tuple[float, Postings]],
+    avg_length: float,
+    top_k: int,
+    heap: list[tuple[float, int, int]],
+) -> None:
+    # MaxScore document-at-a-time traversal. Terms are ordered by their score
+    # upper bound; the low-bound prefix whose bounds sum to no more than the
+    # heap threshold is "non-essential": a doc matching only those terms can't
+    # enter the top k, so those lists are never iterated, only probed for
+    # candidates found via the essential lists.
+    cursors = sorted(
+        (
+            (
+                _term_score(idf, p.max_tf, p.min_length, avg_length) * (1 + 1e-9),
+                idf,
+                p.docs,
+                p.tfs,
+            )
+            for idf, p in term_postings
+        ),
+        # Postings never take part in the order: mmap ones are memoryviews.
+        key=lambda cursor: (cursor[0], cursor[1]),
+    )
+    if not cursors:
+        return
+    prefix: list[float] = []
+    for bound, *_ in cursors:
+        prefix.append(bound + (prefix[-1] if prefix else 0.0))
+    offsets = [0] * len(cursors)
+    threshold = heap[0][0] if len(heap) == top_k else 0.0
+    essential = bisect.bisect_right(prefix, threshold)
+    while essential < len(cursors):
+        ordinal = min(
+            (
+                cursors[i][2][offsets[i]]
+                for i in range(essential, len(cursors))
+                if offsets[i] < len(cursors[i][2])
+            ),
+            default=None,
+        )
+        if ordinal is None:
+            return
+        parts: list[float] = []
+        length = segment.doc_length(ordinal)
+        for i in range(essential, len(cursors)):
+            docs = cursors[i][2]
+            if offsets[i] < len(docs) and docs[offsets[i]] == ordinal:
+                parts.append(
+                    _term_score(cursors[i][1], cursors[i][3][offsets[i]], length, avg_length)
+                )
+                offsets[i] += 1
+        if ordinal in deleted:
+            continue
+        score = sum(parts)
+        for i in range(essential - 1, -1, -1):
+            if score + prefix[i] <= threshold:
+                break
+            docs = cursors[i][2]
+            offsets[i] = bisect.bisect_left(docs, ordinal, offsets[i])
+            if offsets[i] < len(docs) and docs[offsets[i]] == ordinal:
+                parts.append(
+                    _term_score(cursors[i][1], cursors[i][3][offsets[i]], length, avg_length)
+                )
+                score += parts[-1]
+        # fsum is exactly rounded, so equal docs score equal whichever lists
+        # were essential when they were reached; ties then break by position.
+        score = math.fsum(parts)
+        if score <= threshold:
+            continue
+        entry = (score, -position, -ordinal)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+        if len(heap) == top_k:
+            threshold = heap[0][0]
+            essential = bisect.bisect_right(prefix, threshold)
+
+
+class KBIndex:
+    def __init__(
+        self,
+        documents: Iterable[DocumentResource] = (),
+        segments: Iterable[SegmentReader] = (),
+    ) -> None:
+        # Read-only segments (e.g. mmap'd files) come first; the in-memory
+        # segment built from ``documents`` is the tail that absorbs upserts.
+        readers = (*segments, Segment.build(documents))
+        self._snapshot = IndexSnapshot(segments=readers, deleted=(frozenset(),) * len(readers))
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+    def snapshot(self) -> IndexSnapshot:
+        # Readers grab the current immutable snapshot; writers publish a new one
+        # with a single reference assignment.
+        return self._snapshot
+
+    def upsert(self, doc: DocumentResource) -> None:
+        with self._write_lock:
+            current = self._snapshot
+            segments = list(current.segments)
+            deleted = list(current.deleted)
+            location = current.locate(doc.metadata.id)
+            if location is not None:
+                deleted[location[0]] = deleted[location[0]] | {location[1]}
+            tail = segments[-1]
+            if isinstance(tail, Segment) and len(tail) < TAIL_SEGMENT_DOCS:
+                segments[-1] = tail.with_document(doc)
+            else:
+                segments.append(Segment.build([doc]))
+                deleted.append(frozenset())
+            self._snapshot = IndexSnapshot(segments=tuple(segments), deleted=tuple(deleted))
+
+    def delete(self, doc_id: str) -> bool:
+        with self._write_lock:
+            current = self._snapshot
+            location = current.locate(doc_id)
+            if location is None:
+                return False
+            deleted = list(current.deleted)
+            deleted[location[0]] = deleted[location[0]] | {location[1]}
+            self._snapshot = IndexSnapshot(segments=current.segments, deleted=tuple(deleted))
+            return True
+
+    def compact(self) -> bool:
+        with self._compact_lock:
+            start = self._snapshot
+            # Read-only segments keep their tombstones; merging them would pull
+            # their whole content back onto the heap.
+            picked = [
+                position
+                for position, segment in enumerate(start.segments)
+                if isinstance(segment, Segment)
+                and (
+                    len(segment) < TAIL_SEGMENT_DOCS
+                    or len(start.deleted[position]) >= COMPACT_DELETED_RATIO * len(segment)
+                )
+            ]
+            if len(picked) < 2 and not any(start.deleted[p] for p in picked):
+                return False
+            # Merge outside the write lock so upserts keep flowing; deletes that
+            # land meanwhile are replayed onto the merged segment below.
+            merged = Segment.build(
+                start.segments[position].document(ordinal)
+                for position in picked
+                for ordinal in range(len(start.segments[position]))
+                if ordinal not in start.deleted[position]
+            )
+            with self._write_lock:
+                current = self._snapshot
+                replayed: set[int] = set()
+                appended: list[DocumentResource] = []
+                for position in picked:
+                    before = len(start.segments[position])
+                    segment = current.segments[position]
+                    deleted = current.deleted[position]
+                    for ordinal in deleted - start.deleted[position]:
+                        if ordinal < before:
+                            replayed.add(merged.ordinals[segment.doc_id(ordinal)])
+                    # The tail may have absorbed upserts while we were merging.
+                    appended.extend(
+                        segment.document(ordinal)
+                        for ordinal in range(before, len(segment))
+                        if ordinal not in deleted
+                    )
+                kept = [p for p in range(len(current.segments)) if p not in picked]
+                segments = [*(current.segments[p] for p in kept), merged]
+                tombstones = [*(current.deleted[p] for p in kept), frozenset(replayed)]
+                if appended:
+                    segments.append(Segment.build(appended))
+                    tombstones.append(frozenset())
+                self._snapshot = IndexSnapshot(segments=tuple(segments), deleted=tuple(tombstones))
+            return True
+
+    def start_compaction(self, interval_s: float) -> threading.Event:
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval_s):
+                self.compact()
+
+        threading.Thread(target=run, name="kb-compaction", daemon=True).start()
+        return stop
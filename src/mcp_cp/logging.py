@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
-from collections.abc import MutableMapping
+import queue
+import random
+from collections.abc import Mapping, MutableMapping
 from dataclasses import dataclass
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, cast
+
+from mcp_cp.telemetry import logs_dropped
+
+LOG_QUEUE_SIZE = 10_000
+# How long a warning or error waits for room in a full queue before it too is
+# dropped.
+WARNING_PUT_TIMEOUT_S = 1.0
+
+_base_logger = logging.getLogger("mcp_cp")
+_listener: QueueListener | None = None
 
 
 @dataclass
@@ -14,20 +28,111 @@ class LogContext:
 
 
 class ContextLoggerAdapter(logging.LoggerAdapter[logging.Logger]):
+    # Only attaches the context; serialization happens in JSONFormatter on
+    # the writer thread.
     def process(self, msg: str, kwargs: MutableMapping[str, Any]) -> tuple[str, Any]:
         extra = self.extra or {}
-        payload = {
-            "message": msg,
+        kwargs["extra"] = {
             "request_id": extra.get("request_id"),
             "tool_name": extra.get("tool_name"),
         }
-        return json.dumps(payload), kwargs
+        return msg, kwargs
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "tool_name": getattr(record, "tool_name", None),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps a per-tool fraction of records below WARNING; warnings and errors
+    # always pass.
+    def __init__(self, rates: Mapping[str, float], default_rate: float = 1.0) -> None:
+        super().__init__()
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "tool_name", None) or "", self.default_rate)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        logs_dropped.labels(reason="sampled").inc()
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    # A full queue drops info and debug records without blocking the caller;
+    # warnings and errors wait up to WARNING_PUT_TIMEOUT_S for room instead.
+    # Dropped records are counted. Records are queued unformatted; the
+    # listener thread formats them.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                records = cast("queue.Queue[logging.LogRecord]", self.queue)
+                records.put(record, timeout=WARNING_PUT_TIMEOUT_S)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            logs_dropped.labels(reason="queue_full").inc()
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    # "kb.search=0.1,audit.query=0.5"
+    rates: dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        tool, _, rate = item.partition("=")
+        rates[tool.strip()] = float(rate)
+    return rates
 
 
 def get_logger(request_id: str, tool_name: str) -> logging.LoggerAdapter[logging.Logger]:
-    base = logging.getLogger("mcp_cp")
-    return ContextLoggerAdapter(base, {"request_id": request_id, "tool_name": tool_name})
+    return ContextLoggerAdapter(_base_logger, {"request_id": request_id, "tool_name": tool_name})
+
+
+def configure_logging(
+    sample_rates: Mapping[str, float] | None = None,
+    default_sample_rate: float = 1.0,
+    queue_size: int = LOG_QUEUE_SIZE,
+    stream: IO[str] | None = None,
+) -> None:
+    # Callers only filter and enqueue; one listener thread formats and writes.
+    global _listener
+    stop_logging()
+    records: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(JSONFormatter())
+    handler = DroppingQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rates or {}, default_sample_rate))
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    _listener = QueueListener(records, writer, respect_handler_level=True)
+    _listener.start()
+    # Registered once however often logging is reconfigured.
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
 
 
-def configure_logging() -> None:
-    logging.basicConfig(level=logging.INFO, format="%(message)s")
+def stop_logging() -> None:
+    # Flushes queued records; a stopped listener cannot be stopped again.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Any
+import types
+from collections.abc import Callable
+from functools import cache
+from typing import Any, Union, get_args, get_origin
 
 from pydantic import BaseModel, Field
 
@@ -28,8 +31,12 @@ class KBSearchResponse(BaseModel):
 
 
 class AuditQueryInput(BaseModel):
-    q: str
+    q: str = ""
     limit: int = 50
+    filters: dict[str, Any] = Field(default_factory=dict)
+    since: float | None = None
+    until: float | None = None
+    cursor: str | None = None
 
 
 class AuditQueryRow(BaseModel):
@@ -38,6 +45,7 @@ class AuditQueryRow(BaseModel):
 
 class AuditQueryResponse(BaseModel):
     rows: list[AuditQueryRow]
+    next_cursor: str | None = None
 
 
 class DocumentMetadata(BaseModel):
@@ -55,3 +63,104 @@ class ErrorResponse(BaseModel):
     code: int
     message: str
     data: dict[str, Any] | None = None
+
+
+# Field types whose values model_dump() returns as they are.
+_SCALARS: tuple[Any, ...] = (str, int, float, bool, bytes, type(None))
+
+
+@cache
+def payload_encoder(model_cls: type[BaseModel]) -> Callable[[BaseModel], dict[str, Any]]:
+    # Same output as model_dump(), from a function generated once per class
+    # off its field annotations: scalars are passed through, containers are
+    # copied and nested models are inlined, so encoding a page of rows is a
+    # single comprehension. Values typed Any (or anything else that is not a
+    # plain scalar) are walked at run time, since they may hold models. Models
+    # that customize serialization use their pydantic-core serializer instead.
+    if not _plain(model_cls):
+        serializer = model_cls.__pydantic_serializer__
+        return lambda model: serializer.to_python(model)
+    namespace: dict[str, Any] = {
+        "_to_payload": to_payload,
+        "_dynamic": _dynamic,
+        "_scalars": frozenset(_SCALARS),
+    }
+    source = f"def encode(model):\n    return {_model_expression(model_cls, 'model', (), 0)}\n"
+    exec(compile(source, f"<payload encoder {model_cls.__qualname__}>", "exec"), namespace)
+    encode: Callable[[BaseModel], dict[str, Any]] = namespace["encode"]
+    return encode
+
+
+def to_payload(model: BaseModel) -> dict[str, Any]:
+    return payload_encoder(type(model))(model)
+
+
+def _plain(model_cls: type[BaseModel]) -> bool:
+    decorators = model_cls.__pydantic_decorators__
+    return not (
+        model_cls.model_computed_fields
+        or decorators.field_serializers
+        or decorators.model_serializers
+        or model_cls.model_config.get("extra") == "allow"
+        or any(info.serialization_alias or info.alias for info in model_cls.model_fields.values())
+    )
+
+
+def _model_expression(
+    model_cls: type[BaseModel], value: str, stack: tuple[type[BaseModel], ...], depth: int
+) -> str:
+    if model_cls in stack or not _plain(model_cls):
+        return f"_to_payload({value})"
+    items = []
+    for name, info in model_cls.model_fields.items():
+        field = f"{value}.__dict__[{name!r}]"
+        encoded = _expression(info.annotation, field, (*stack, model_cls), depth)
+        items.append(f"{name!r}: {encoded or field}")
+    return "{" + ", ".join(items) + "}"
+
+
+def _expression(
+    annotation: Any, value: str, stack: tuple[type[BaseModel], ...], depth: int
+) -> str | None:
+    # Source that encodes `value`, or None when it is used as is.
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_expression(annotation, value, stack, depth)
+    origin = get_origin(annotation)
+    item = f"_v{depth}"
+    if origin is list:
+        if get_args(annotation)[0] is Any:
+            kinds = f"map(type, {value})"
+            return f"(list({value}) if _scalars.issuperset({kinds}) else _dynamic({value}))"
+        encoded = _expression(get_args(annotation)[0], item, stack, depth + 1)
+        return f"list({value})" if encoded is None else f"[{encoded} for {item} in {value}]"
+    if origin is dict:
+        if get_args(annotation)[1] is Any:
+            # Usually all scalars: one C-level type check, then a plain copy.
+            kinds = f"map(type, {value}.values())"
+            return f"(dict({value}) if _scalars.issuperset({kinds}) else _dynamic({value}))"
+        encoded = _expression(get_args(annotation)[1], item, stack, depth + 1)
+        key = f"_k{depth}"
+        if encoded is None:
+            return f"dict({value})"
+        return f"{{{key}: {encoded} for {key}, {item} in {value}.items()}}"
+    if origin is Union or origin is types.UnionType:
+        options = [arg for arg in get_args(annotation) if arg is not type(None)]
+        encodings = [_expression(arg, value, stack, depth) for arg in options]
+        if all(encoded is None for encoded in encodings):
+            return None
+        if len(options) == 1:
+            return f"(None if {value} is None else {encodings[0]})"
+        return f"_dynamic({value})"
+    if annotation in _SCALARS:
+        return None
+    return f"({value} if {value}.__class__ in _scalars else _dynamic({value}))"
+
+
+def _dynamic(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return to_payload(value)
+    if isinstance(value, list):
+        return [_dynamic(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _dynamic(item) for key, item in value.items()}
+    return value
@@ -1,25 +1,171 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
 
 DEFAULT_SCOPE_MAP = {
     "read": {"kb.search", "kb.resource", "health.check"},
     "audit": {"audit.query", "health.check"},
 }
 
+MAX_CACHED_TOKENS = 1024
+RELOAD_INTERVAL_S = 2.0
 
-@dataclass
+logger = logging.getLogger("mcp_cp")
+
+
+@dataclass(frozen=True)
 class PolicyDecision:
     allowed: bool
     reason: str | None = None
 
 
+ALLOWED = PolicyDecision(allowed=True)
+_NO_ACTIONS: Mapping[str, PolicyDecision] = MappingProxyType({})
+
+
 class ScopePolicy:
-    def __init__(self, scope_map: dict[str, set[str]] | None = None) -> None:
-        self.scope_map = scope_map or DEFAULT_SCOPE_MAP
+    # The scope map is compiled once into an immutable scope -> action ->
+    # decision table. Decisions are shared instances, so the per-request cost
+    # is two dict lookups; only denials for unknown scopes or actions format
+    # a reason.
+    def __init__(self, scope_map: Mapping[str, Iterable[str]] | None = None) -> None:
+        self.scope_map = {
+            scope: frozenset(actions) for scope, actions in (scope_map or DEFAULT_SCOPE_MAP).items()
+        }
+        known_actions = frozenset().union(*self.scope_map.values())
+        self._table: Mapping[str, Mapping[str, PolicyDecision]] = MappingProxyType(
+            {
+                scope: MappingProxyType(
+                    {
+                        action: ALLOWED if action in actions else _denied(scope, action)
+                        for action in known_actions
+                    }
+                )
+                for scope, actions in self.scope_map.items()
+            }
+        )
 
     def allows(self, scope: str, action: str) -> PolicyDecision:
-        allowed_actions = self.scope_map.get(scope, set())
-        if action in allowed_actions:
-            return PolicyDecision(allowed=True)
-        return PolicyDecision(allowed=False, reason=f"scope '{scope}' does not allow '{action}'")
+        decision = self._table.get(scope, _NO_ACTIONS).get(action)
+        return decision if decision is not None else _denied(scope, action)
+
+
+def _denied(scope: str, action: str) -> PolicyDecision:
+    return PolicyDecision(allowed=False, reason=f"scope '{scope}' does not allow '{action}'")
+
+
+@dataclass(frozen=True)
+class Principal:
+    name: str
+    # None grants every scope.
+    scopes: frozenset[str] | None = None
+
+    def grants(self, scope: str) -> bool:
+        return self.scopes is None or scope in self.scopes
+
+
+class Credentials:
+    # Bearer tokens are held only as SHA-256 digests and a presented token is
+    # hashed before it is looked up. Comparing digests instead of secrets
+    # keeps the check constant-time: how far a guess matches a real token
+    # says nothing about how far its digest matches. Validated Authorization
+    # headers are cached so repeat callers skip the hash; failures never are.
+    def __init__(self, digests: Mapping[bytes, Principal]) -> None:
+        self._digests = dict(digests)
+        self._validated: dict[bytes, Principal] = {}
+
+    @classmethod
+    def from_tokens(cls, tokens: Mapping[str, Principal]) -> Credentials:
+        return cls({_digest(token.encode("latin-1")): p for token, p in tokens.items() if token})
+
+    def authenticate(self, auth_header: bytes) -> Principal | None:
+        principal = self._validated.get(auth_header)
+        if principal is not None:
+            return principal
+        if not auth_header.startswith(b"Bearer "):
+            return None
+        principal = self._digests.get(_digest(auth_header[7:]))
+        if principal is None:
+            return None
+        if len(self._validated) >= MAX_CACHED_TOKENS:
+            self._validated.clear()
+        self._validated[auth_header] = principal
+        return principal
+
+
+def _digest(token: bytes) -> bytes:
+    return hashlib.sha256(token).digest()
+
+
+@dataclass(frozen=True)
+class AccessConfig:
+    policy: ScopePolicy
+    credentials: Credentials
+
+    @classmethod
+    def from_token(cls, token: str, policy: ScopePolicy | None = None) -> AccessConfig:
+        credentials = Credentials.from_tokens({token: Principal("default")})
+        return cls(policy or ScopePolicy(), credentials)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> AccessConfig:
+        # {"scopes": {"read": ["kb.search", ...]},
+        #  "tokens": [{"name": "ci", "token" | "sha256": "...", "scopes": ["read"]}]}
+        policy = ScopePolicy(data.get("scopes"))
+        digests: dict[bytes, Principal] = {}
+        for entry in data.get("tokens", []):
+            granted = entry.get("scopes")
+            principal = Principal(
+                str(entry.get("name", "")), None if granted is None else frozenset(granted)
+            )
+            if "sha256" in entry:
+                digests[bytes.fromhex(entry["sha256"])] = principal
+            elif entry.get("token"):
+                digests[_digest(str(entry["token"]).encode("latin-1"))] = principal
+        return cls(policy, Credentials(digests))
+
+
+class AccessConfigFile:
+    # Serves the AccessConfig loaded from a JSON file and swaps in a new one
+    # when the file changes. Requests read `current` once, so each sees either
+    # the old or the new config, never a mix. A file that fails to load is
+    # logged and the previous config stays in force.
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self.current = self._load()
+
+    def reload(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+            config = self._load()
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            logger.error("access config reload failed: %s", exc)
+            return False
+        self._mtime = mtime
+        self.current = config
+        return True
+
+    def start(self, interval_s: float = RELOAD_INTERVAL_S) -> threading.Event:
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval_s):
+                self.reload()
+
+        threading.Thread(target=run, name="access-config-reload", daemon=True).start()
+        return stop
+
+    def _load(self) -> AccessConfig:
+        with open(self.path, encoding="utf-8") as handle:
+            return AccessConfig.from_dict(json.load(handle))
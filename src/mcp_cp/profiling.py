@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import FrameType
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from mcp_cp.policy import Credentials, Principal
+
+DEFAULT_CAPTURE_SECONDS = 10.0
+MAX_CAPTURE_SECONDS = 60.0
+SAMPLE_INTERVAL_S = 0.005
+ALLOCATION_FRAMES = 16
+ALLOCATION_TOP = 50
+
+
+def sample_stacks(seconds: float, interval_s: float = SAMPLE_INTERVAL_S) -> Counter[str]:
+    # Samples the Python stack of every other thread each interval and counts
+    # them as folded stacks ("thread;outer;...;inner"), the input format of
+    # flamegraph.pl and speedscope. Nothing is traced between samples, so the
+    # process runs at full speed while it is profiled.
+    own = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            current: FrameType | None = frame
+            while current is not None:
+                code = current.f_code
+                frames.append(f"{code.co_qualname} ({code.co_filename}:{current.f_lineno})")
+                current = current.f_back
+            frames.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(frames))] += 1
+        time.sleep(interval_s)
+    return stacks
+
+
+def profile_cpu(seconds: float) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sample_stacks(seconds).most_common())
+
+
+def profile_allocations(seconds: float) -> str:
+    # Memory allocated during the window and still live at its end, largest
+    # first, with the allocating stack.
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(ALLOCATION_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    lines = []
+    for stat in after.compare_to(before, "traceback")[:ALLOCATION_TOP]:
+        lines.append(f"{stat.size_diff / 1024:+.1f} KiB in {stat.count_diff:+d} blocks")
+        lines.extend(f"  {line}" for line in stat.traceback.format(most_recent_first=True))
+    return "\n".join(lines) + "\n"
+
+
+CAPTURES: dict[str, Callable[[float], str]] = {
+    "/debug/profile": profile_cpu,
+    "/debug/allocations": profile_allocations,
+}
+
+
+def start_profiling_server(port: int, token: str, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    # GET /debug/profile?seconds=N or /debug/allocations?seconds=N with the
+    # admin bearer token. One capture runs at a time; others get 409.
+    credentials = Credentials.from_tokens({token: Principal("admin")})
+    capturing = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            auth = self.headers.get("Authorization", "").encode("latin-1", "replace")
+            if credentials.authenticate(auth) is None:
+                self._reply(401, "unauthorized\n")
+                return
+            url = urlsplit(self.path)
+            capture = CAPTURES.get(url.path)
+            if capture is None:
+                self._reply(404, "not found\n")
+                return
+            try:
+                seconds = float(
+                    parse_qs(url.query).get("seconds", [str(DEFAULT_CAPTURE_SECONDS)])[0]
+                )
+            except ValueError:
+                seconds = -1.0
+            if not 0 < seconds <= MAX_CAPTURE_SECONDS:
+                self._reply(400, f"seconds must be in (0, {MAX_CAPTURE_SECONDS:g}]\n")
+                return
+            if not capturing.acquire(blocking=False):
+                self._reply(409, "a capture is already running\n")
+                return
+            try:
+                body = capture(seconds)
+            finally:
+                capturing.release()
+            self._reply(200, body)
+
+        def _reply(self, status: int, body: str) -> None:
+            encoded = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="profiling-server", daemon=True).start()
+    return server
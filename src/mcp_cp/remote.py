@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import importlib.util
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import quote
+
+import httpx
+
+from mcp_cp.models import AuditQueryInput, AuditQueryResponse, DocumentResource, KBSearchResponse
+
+
+@dataclass(frozen=True)
+class HTTPPoolConfig:
+    connect_timeout_s: float = 2.0
+    read_timeout_s: float = 10.0
+    write_timeout_s: float = 10.0
+    pool_timeout_s: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_s: float = 30.0
+    # HTTP/2 needs the optional h2 package (httpx[http2]).
+    http2: bool = importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(
+    config: HTTPPoolConfig | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    # One client per process, shared by every remote adapter, so calls reuse
+    # pooled keep-alive connections instead of paying a handshake each time.
+    config = config or HTTPPoolConfig()
+    return httpx.AsyncClient(
+        http2=config.http2,
+        timeout=httpx.Timeout(
+            connect=config.connect_timeout_s,
+            read=config.read_timeout_s,
+            write=config.write_timeout_s,
+            pool=config.pool_timeout_s,
+        ),
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry_s,
+        ),
+        transport=transport,
+    )
+
+
+@dataclass
+class HTTPKBAdapter:
+    # GET {base_url}/search?query=&top_k= -> KBSearchResponse
+    # GET {base_url}/documents/{doc_id}   -> DocumentResource
+    # GET {base_url}/health               -> any 2xx
+    client: httpx.AsyncClient
+    base_url: str
+
+    async def search(self, query: str, top_k: int) -> KBSearchResponse:
+        response = await self.client.get(
+            f"{self.base_url.rstrip('/')}/search", params={"query": query, "top_k": top_k}
+        )
+        response.raise_for_status()
+        return KBSearchResponse.model_validate_json(response.content)
+
+    async def get_document(self, doc_id: str) -> DocumentResource:
+        response = await self.client.get(
+            f"{self.base_url.rstrip('/')}/documents/{quote(doc_id, safe='')}"
+        )
+        if response.status_code == 404:
+            raise KeyError(f"Document {doc_id} not found")
+        response.raise_for_status()
+        return DocumentResource.model_validate_json(response.content)
+
+    async def probe(self) -> None:
+        response = await self.client.get(f"{self.base_url.rstrip('/')}/health")
+        response.raise_for_status()
+
+
+@dataclass
+class HTTPAuditAdapter:
+    # POST {base_url}/query with an AuditQueryInput body -> AuditQueryResponse
+    # GET  {base_url}/health                               -> any 2xx
+    client: httpx.AsyncClient
+    base_url: str
+
+    async def query(
+        self,
+        q: str,
+        limit: int,
+        filters: Mapping[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> AuditQueryResponse:
+        body = AuditQueryInput(
+            q=q, limit=limit, filters=dict(filters or {}), since=since, until=until, cursor=cursor
+        )
+        response = await self.client.post(
+            f"{self.base_url.rstrip('/')}/query", json=body.model_dump(exclude_none=True)
+        )
+        response.raise_for_status()
+        return AuditQueryResponse.model_validate_json(response.content)
+
+    async def probe(self) -> None:
+        response = await self.client.get(f"{self.base_url.rstrip('/')}/health")
+        response.raise_for_status()
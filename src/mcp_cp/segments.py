@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+from mcp_cp.index import Postings, Segment
+from mcp_cp.models import DocumentMetadata, DocumentResource
+
+# On-disk KB segment layout (little-endian, all offsets absolute):
+#
+#   header    magic, version, doc_count, term_count, total_length, section offsets
+#   strings   utf-8 terms, doc ids, titles, tags (json) and content
+#   postings  per term: uint32 doc ordinals, term frequencies, df + 1 position
+#             starts and the utf-8 byte offsets of matches in the content
+#   terms     fixed-width entries sorted by term bytes, binary searched on lookup;
+#             each carries the max tf and min doc length of its postings
+#   docs      fixed-width entries indexed by ordinal
+#   ids       uint32 ordinals sorted by doc id bytes, binary searched on lookup
+MAGIC = b"MCPKBSEG"
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<8sIIIIQQQQ")
+_TERM = struct.Struct("<QIQIII")
+_DOC = struct.Struct("<IQIQIQIQI")
+_U32 = struct.Struct("<I")
+
+
+class SegmentFormatError(ValueError):
+    pass
+
+
+def write_segment(path: str | os.PathLike[str], documents: Iterable[DocumentResource]) -> None:
+    segment = Segment.build(documents)
+    strings = bytearray()
+
+    def put(value: str) -> tuple[int, int]:
+        encoded = value.encode("utf-8")
+        offset = _HEADER.size + len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    terms = sorted((term.encode("utf-8"), term) for term in segment.terms)
+    term_refs = [put(term) for _, term in terms]
+    doc_refs = [
+        (
+            put(doc.metadata.id),
+            put(doc.metadata.title),
+            put(json.dumps(doc.metadata.tags)),
+            put(doc.content),
+        )
+        for doc in segment.documents
+    ]
+    strings.extend(b"\0" * (-len(strings) % 4))
+
+    postings = bytearray()
+    postings_base = _HEADER.size + len(strings)
+    term_table = bytearray()
+    byte_offsets = [_byte_offsets(doc.content) for doc in segment.documents]
+    for (term_off, term_len), (_, term) in zip(term_refs, terms, strict=True):
+        doc_list, tf_list, offset_lists = segment.terms[term]
+        term_table += _TERM.pack(
+            term_off,
+            term_len,
+            postings_base + len(postings),
+            len(doc_list),
+            *segment.bounds[term],
+        )
+        starts = [0]
+        positions: list[int] = []
+        for ordinal, offsets in zip(doc_list, offset_lists, strict=True):
+            to_bytes = byte_offsets[ordinal]
+            positions.extend(offsets if to_bytes is None else (to_bytes[o] for o in offsets))
+            starts.append(len(positions))
+        postings += b"".join(_u32_bytes(v) for v in (doc_list, tf_list, starts, positions))
+
+    doc_table = bytearray()
+    for ordinal, refs in enumerate(doc_refs):
+        doc_table += _DOC.pack(segment.doc_lengths[ordinal], *(v for ref in refs for v in ref))
+    by_id = sorted(range(len(segment)), key=lambda o: segment.documents[o].metadata.id.encode())
+
+    terms_off = postings_base + len(postings)
+    docs_off = terms_off + len(term_table)
+    ids_off = docs_off + len(doc_table)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(segment),
+        len(terms),
+        0,
+        segment.total_length,
+        terms_off,
+        docs_off,
+        ids_off,
+    )
+    tmp_path = Path(f"{os.fspath(path)}.tmp")
+    with tmp_path.open("wb") as handle:
+        for chunk in (header, strings, postings, term_table, doc_table, _u32_bytes(by_id)):
+            handle.write(chunk)
+        handle.flush()
+        os.fsync(handle.fileno())
+    # Segments are immutable once published; replicas may already have the old one mapped.
+    tmp_path.replace(path)
+
+
+def _byte_offsets(content: str) -> list[int] | None:
+    # Positions are stored as byte offsets so snippets can slice the mapped
+    # content without decoding the whole document.
+    if content.isascii():
+        return None
+    offsets = [0]
+    for char in content:
+        offsets.append(offsets[-1] + len(char.encode("utf-8")))
+    return offsets
+
+
+def _u32_bytes(values: Sequence[int]) -> bytes:
+    packed = array("I", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+class MmapSegment:
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            raise SegmentFormatError(f"{path} is not a KB segment")
+        (
+            magic,
+            version,
+            self._doc_count,
+            self._term_count,
+            _,
+            self.total_length,
+            self._terms_off,
+            self._docs_off,
+            self._ids_off,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SegmentFormatError(f"{path} is not a v{FORMAT_VERSION} KB segment")
+        self.path = os.fspath(path)
+        self._view = memoryview(self._mm)
+
+    def __len__(self) -> int:
+        return int(self._doc_count)
+
+    def postings(self, term: str) -> Postings | None:
+        position = self._find_term(term.encode("utf-8"))
+        if position is None:
+            return None
+        _, _, offset, df, max_tf, min_length = _TERM.unpack_from(
+            self._mm, self._terms_off + position * _TERM.size
+        )
+        return Postings(
+            self._u32_array(offset, df), self._u32_array(offset + 4 * df, df), max_tf, min_length
+        )
+
+    def positions(self, term: str, ordinal: int) -> Sequence[int]:
+        position = self._find_term(term.encode("utf-8"))
+        if position is None:
+            return ()
+        _, _, offset, df, _, _ = _TERM.unpack_from(
+            self._mm, self._terms_off + position * _TERM.size
+        )
+        docs = self._u32_array(offset, df)
+        index = bisect.bisect_left(docs, ordinal)
+        if index == df or docs[index] != ordinal:
+            return ()
+        starts_off = offset + 8 * df
+        start, end = struct.unpack_from("<II", self._mm, starts_off + 4 * index)
+        return self._u32_array(starts_off + 4 * (df + 1) + 4 * start, end - start)
+
+    def doc_length(self, ordinal: int) -> int:
+        return int(_U32.unpack_from(self._mm, self._docs_off + ordinal * _DOC.size)[0])
+
+    def ordinal(self, doc_id: str) -> int | None:
+        target = doc_id.encode("utf-8")
+        low, high = 0, self._doc_count
+        while low < high:
+            middle = (low + high) // 2
+            ordinal = _U32.unpack_from(self._mm, self._ids_off + middle * 4)[0]
+            candidate = self._field(ordinal, 0)
+            if candidate == target:
+                return int(ordinal)
+            if candidate < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def doc_id(self, ordinal: int) -> str:
+        return self._field(ordinal, 0).decode("utf-8")
+
+    def title(self, ordinal: int) -> str:
+        return self._field(ordinal, 1).decode("utf-8")
+
+    def content(self, ordinal: int) -> str:
+        return self._field(ordinal, 3).decode("utf-8")
+
+    def content_slice(self, ordinal: int, start: int, end: int) -> str:
+        entry = _DOC.unpack_from(self._mm, self._docs_off + ordinal * _DOC.size)
+        offset, length = entry[7], entry[8]
+        end = min(end, length)
+        # Byte windows may split a multi-byte character at either edge.
+        return self._mm[offset + start : offset + end].decode("utf-8", errors="ignore")
+
+    def document(self, ordinal: int) -> DocumentResource:
+        return DocumentResource(
+            metadata=DocumentMetadata(
+                id=self.doc_id(ordinal),
+                title=self.title(ordinal),
+                tags=json.loads(self._field(ordinal, 2)),
+            ),
+            content=self.content(ordinal),
+        )
+
+    def _field(self, ordinal: int, index: int) -> bytes:
+        entry = _DOC.unpack_from(self._mm, self._docs_off + ordinal * _DOC.size)
+        offset, length = entry[1 + 2 * index], entry[2 + 2 * index]
+        return self._mm[offset : offset + length]
+
+    def _find_term(self, target: bytes) -> int | None:
+        low, high = 0, self._term_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, *_ = _TERM.unpack_from(self._mm, self._terms_off + middle * _TERM.size)
+            candidate = self._mm[offset : offset + length]
+            if candidate == target:
+                return int(middle)
+            if candidate < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _u32_array(self, offset: int, count: int) -> Sequence[int]:
+        if sys.byteorder == "little":
+            return self._view[offset : offset + 4 * count].cast("I")
+        values = array("I", self._mm[offset : offset + 4 * count])
+        values.byteswap()
+        return values
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    # python -m mcp_cp.segments OUTPUT [DOCS.jsonl ...]: one DocumentResource per line.
+    args = list(sys.argv[1:] if argv is None else argv)
+    if not args:
+        raise SystemExit("usage: python -m mcp_cp.segments OUTPUT [DOCS.jsonl ...]")
+    output, sources = args[0], args[1:] or ["-"]
+
+    def documents() -> Iterable[DocumentResource]:
+        for source in sources:
+            with sys.stdin if source == "-" else open(source, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        yield DocumentResource.model_validate_json(line)
+
+    write_segment(output, documents())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import inspect
+import itertools
 import json
+import math
 import os
-from collections.abc import Awaitable, Callable
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Iterator, Mapping
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 from uuid import uuid4
 
-from mcp.server import Server
-from mcp.server.http import StreamableHTTPServer
-from mcp.server.stdio import stdio_server
-from prometheus_client import start_http_server
+from pydantic_core import to_json
 
 from mcp_cp.adapters import (
+    AsyncAuditAdapter,
+    AsyncKBAdapter,
     AuditAdapter,
     KBAdapter,
+    KBChangeSource,
+    StreamingAuditAdapter,
     default_audit_adapter,
     default_kb_adapter,
 )
-from mcp_cp.logging import configure_logging, get_logger
+from mcp_cp.admission import DEFAULT_MAX_IN_FLIGHT, AdmissionController, parse_rate_limits
+from mcp_cp.cache import CacheKey, ResponseCache, TTLCache, normalize_query
+from mcp_cp.execution import SingleFlight, ToolExecutor, parse_tool_limits
+from mcp_cp.health import DEFAULT_PROBE_INTERVAL_S, DEFAULT_PROBE_TIMEOUT_S, DependencyProbes
+from mcp_cp.logging import configure_logging, get_logger, parse_sample_rates
 from mcp_cp.models import (
     AuditQueryInput,
     AuditQueryResponse,
@@ -28,14 +40,39 @@ from mcp_cp.models import (
     HealthCheckResponse,
     KBSearchInput,
     KBSearchResponse,
+    to_payload,
 )
-from mcp_cp.policy import ScopePolicy
-from mcp_cp.telemetry import configure_tracing, request_span
+from mcp_cp.policy import AccessConfig, AccessConfigFile, PolicyDecision, ScopePolicy
+from mcp_cp.telemetry import (
+    configure_tracing,
+    mark_worker_dead,
+    record_stage,
+    request_span,
+    start_metrics_server,
+)
+
+if TYPE_CHECKING:
+    from mcp.server import Server
+    from pydantic import BaseModel
+
+# The MCP SDK (whose server package pulls in httpx, starlette and uvicorn),
+# transport, exporter, remote-adapter and admin modules are imported where
+# they are used: the stdio entry point is started per agent session and should
+# load only what its MCP_MODE and configuration need.
+
+T = TypeVar("T")
 
 ASGIApp = Callable[[dict[str, Any], "Receive", "Send"], Awaitable[None]]
 Receive = Callable[[], Awaitable[dict[str, Any]]]
 Send = Callable[[dict[str, Any]], Awaitable[None]]
 
+NDJSON = "application/x-ndjson"
+NDJSON_BYTES = NDJSON.encode("latin-1")
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_REQUESTS = 64
+STREAM_CHUNK_ROWS = 256
+STDIO_MAX_IN_FLIGHT = 16
+
 
 @dataclass
 class RequestContext:
@@ -48,14 +85,19 @@ def _request_id_from_context(context: Any | None) -> str:
     return getattr(context, "request_id", str(uuid4()))
 
 
-def handle_health_check(version: str, context: RequestContext | None = None) -> HealthCheckResponse:
+def handle_health_check(
+    version: str,
+    context: RequestContext | None = None,
+    deps: Mapping[str, str] | None = None,
+) -> HealthCheckResponse:
     request_id = _request_id_from_context(context)
     logger = get_logger(request_id, "health.check")
     with request_span("tool", "health.check"):
         logger.info("health_check")
+        deps = dict(deps or {})
         return HealthCheckResponse(
-            status="ok",
-            deps={"kb": "ok", "audit": "ok"},
+            status="ok" if all(status == "ok" for status in deps.values()) else "degraded",
+            deps=deps,
             version=version,
         )
 
@@ -67,7 +109,12 @@ def handle_kb_search(
     logger = get_logger(request_id, "kb.search")
     with request_span("tool", "kb.search"):
         logger.info("kb_search")
-        return adapter.search(input_data.query, input_data.top_k)
+        started = time.perf_counter()
+        try:
+            return adapter.search(input_data.query, input_data.top_k)
+        finally:
+            # Failed calls count too: a slow failure is still adapter time.
+            record_stage("adapter", started)
 
 
 def handle_audit_query(
@@ -79,7 +126,18 @@ def handle_audit_query(
     logger = get_logger(request_id, "audit.query")
     with request_span("tool", "audit.query"):
         logger.info("audit_query")
-        return adapter.query(input_data.q, input_data.limit)
+        started = time.perf_counter()
+        try:
+            return adapter.query(
+                input_data.q,
+                input_data.limit,
+                filters=input_data.filters,
+                since=input_data.since,
+                until=input_data.until,
+                cursor=input_data.cursor,
+            )
+        finally:
+            record_stage("adapter", started)
 
 
 def handle_kb_resource(
@@ -89,30 +147,171 @@ def handle_kb_resource(
     logger = get_logger(request_id, "kb.resource")
     with request_span("resource", "kb.resource"):
         logger.info("kb_resource")
-        return adapter.get_document(doc_id)
+        started = time.perf_counter()
+        try:
+            return adapter.get_document(doc_id)
+        finally:
+            record_stage("adapter", started)
+
+
+async def handle_kb_search_async(
+    adapter: AsyncKBAdapter, input_data: KBSearchInput, context: RequestContext | None = None
+) -> KBSearchResponse:
+    request_id = _request_id_from_context(context)
+    logger = get_logger(request_id, "kb.search")
+    with request_span("tool", "kb.search"):
+        logger.info("kb_search")
+        started = time.perf_counter()
+        try:
+            return await adapter.search(input_data.query, input_data.top_k)
+        finally:
+            record_stage("adapter", started)
 
 
-def create_server(kb_adapter: KBAdapter, audit_adapter: AuditAdapter, version: str) -> Server:
+async def handle_audit_query_async(
+    adapter: AsyncAuditAdapter,
+    input_data: AuditQueryInput,
+    context: RequestContext | None = None,
+) -> AuditQueryResponse:
+    request_id = _request_id_from_context(context)
+    logger = get_logger(request_id, "audit.query")
+    with request_span("tool", "audit.query"):
+        logger.info("audit_query")
+        started = time.perf_counter()
+        try:
+            return await adapter.query(
+                input_data.q,
+                input_data.limit,
+                filters=input_data.filters,
+                since=input_data.since,
+                until=input_data.until,
+                cursor=input_data.cursor,
+            )
+        finally:
+            record_stage("adapter", started)
+
+
+async def handle_kb_resource_async(
+    adapter: AsyncKBAdapter, doc_id: str, context: RequestContext | None = None
+) -> DocumentResource:
+    request_id = _request_id_from_context(context)
+    logger = get_logger(request_id, "kb.resource")
+    with request_span("resource", "kb.resource"):
+        logger.info("kb_resource")
+        started = time.perf_counter()
+        try:
+            return await adapter.get_document(doc_id)
+        finally:
+            record_stage("adapter", started)
+
+
+def create_server(
+    kb_adapter: KBAdapter | AsyncKBAdapter,
+    audit_adapter: AuditAdapter | AsyncAuditAdapter,
+    version: str,
+    executor: ToolExecutor | None = None,
+    cache: ResponseCache | None = None,
+    probes: DependencyProbes | None = None,
+    max_in_flight: int | None = None,
+) -> Server:
+    from mcp.server import Server
+
     server = Server("mcp-control-plane")
+    tools = executor or ToolExecutor()
+    flights = SingleFlight()
+    # Bounds tool executions across all sessions and transports; cache hits
+    # and coalesced calls do not take a slot.
+    slots = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+    # Async adapters are awaited on the loop; sync ones go to the executor pool.
+    kb_async = inspect.iscoroutinefunction(kb_adapter.search)
+    search: Callable[..., Any] = handle_kb_search_async if kb_async else handle_kb_search
+    resource: Callable[..., Any] = handle_kb_resource_async if kb_async else handle_kb_resource
+    query: Callable[..., Any] = (
+        handle_audit_query_async
+        if inspect.iscoroutinefunction(audit_adapter.query)
+        else handle_audit_query
+    )
+
+    if cache is not None and isinstance(kb_adapter, KBChangeSource):
+        # Any document change can reorder search results; only its own
+        # resource entry is affected otherwise.
+        def invalidate(doc_id: str) -> None:
+            cache.invalidate(("kb.resource", doc_id))
+            cache.invalidate_tool("kb.search")
+
+        kb_adapter.subscribe(invalidate)
+
+    async def execute(call: Callable[[], Awaitable[BaseModel]]) -> BaseModel:
+        if slots is None:
+            return await call()
+        async with slots:
+            return await call()
+
+    def dump(model: BaseModel) -> dict[str, Any]:
+        started = time.perf_counter()
+        result = to_payload(model)
+        record_stage("serialize", started)
+        return result
+
+    async def dispatch(
+        key: CacheKey, call: Callable[[], Awaitable[BaseModel]], cacheable: bool = True
+    ) -> dict[str, Any]:
+        # Coalesced calls and cache hits share the model, which is never
+        # handed out; each caller gets its own payload to do with as it likes.
+        store = cache if cacheable else None
+        if store is None:
+            return dump(await flights.do(key, lambda: execute(call)))
+        hit = store.get(key)
+        if hit is not None:
+            return dump(hit)
+        # Calls arriving after an invalidation must not join an older flight.
+        generation = store.generation()
+        model = await flights.do((*key, generation), lambda: execute(call))
+        store.set(key, model, generation)
+        return dump(model)
 
     @server.tool("health.check")  
     async def health_check() -> dict[str, Any]:
-        return handle_health_check(version).model_dump()  # type: ignore[no-any-return]
+        deps = probes.snapshot() if probes is not None else None
+        return to_payload(handle_health_check(version, deps=deps))
 
     @server.tool("kb.search")  # type: ignore[misc]
     async def kb_search(query: str, top_k: int = 5) -> dict[str, Any]:
-        result = handle_kb_search(kb_adapter, KBSearchInput(query=query, top_k=top_k))
-        return result.model_dump()  # type: ignore[no-any-return]
+        started = time.perf_counter()
+        input_data = KBSearchInput(query=query, top_k=top_k)
+        record_stage("validate", started)
+        return await dispatch(
+            ("kb.search", normalize_query(query), top_k),
+            lambda: tools.run("kb.search", search, kb_adapter, input_data),
+        )
 
     @server.tool("audit.query")  # type: ignore[misc]
-    async def audit_query(q: str, limit: int = 50) -> dict[str, Any]:
-        result = handle_audit_query(audit_adapter, AuditQueryInput(q=q, limit=limit))
-        return result.model_dump()  # type: ignore[no-any-return]
+    async def audit_query(
+        q: str = "",
+        limit: int = 50,
+        filters: dict[str, Any] | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        cursor: str | None = None,
+    ) -> dict[str, Any]:
+        started = time.perf_counter()
+        input_data = AuditQueryInput(
+            q=q, limit=limit, filters=filters or {}, since=since, until=until, cursor=cursor
+        )
+        record_stage("validate", started)
+        key = ("audit.query", input_data.model_dump_json())
+        return await dispatch(
+            key,
+            lambda: tools.run("audit.query", query, audit_adapter, input_data),
+            cacheable=False,
+        )
 
     @server.resource("kb://documents/{doc_id}")  
     async def kb_document(doc_id: str) -> dict[str, Any]:
-        result = handle_kb_resource(kb_adapter, doc_id)
-        return result.model_dump()  # type: ignore[no-any-return]
+        return await dispatch(
+            ("kb.resource", doc_id),
+            lambda: tools.run("kb.resource", resource, kb_adapter, doc_id),
+        )
 
     @server.prompt("incident_triage")  
     async def incident_triage() -> str:
@@ -125,38 +324,100 @@ def create_server(kb_adapter: KBAdapter, audit_adapter: AuditAdapter, version: s
 
 
 class AuthPolicyMiddleware:
-    def __init__(self, app: ASGIApp, token: str, policy: ScopePolicy) -> None:
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        policy: ScopePolicy,
+        audit_adapter: StreamingAuditAdapter | None = None,
+        max_body_bytes: int = MAX_BODY_BYTES,
+        admission: AdmissionController | None = None,
+        access: AccessConfigFile | None = None,
+        executor: ToolExecutor | None = None,
+    ) -> None:
         self.app = app
         self.token = token
         self.policy = policy
+        self.audit_adapter = audit_adapter
+        self.max_body_bytes = max_body_bytes
+        self.admission = admission
+        # A reloadable access file, when given, replaces token and policy.
+        self.access = access
+        self.executor = executor or ToolExecutor()
+        self._static_access = AccessConfig.from_token(token, policy)
 
     async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send) -> None:
         if scope.get("type") != "http":
             await self.app(scope, receive, send)
             return
 
-        body = await _read_body(receive)
-        request = json.loads(body.decode("utf-8")) if body else {}
-        request_id = request.get("id")
-        method = request.get("method")
-        params = request.get("params", {})
-
-        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
-        auth_header = headers.get("authorization", "")
-        scope_header = headers.get("x-mcp-scope", "")
-        if not self._authorized(auth_header):
+        mark = time.perf_counter()
+        # Everything needed before the body is read comes from one pass over
+        # the raw header list; unauthorized or oversized requests are
+        # rejected without buffering anything.
+        auth_header = scope_header = accept = b""
+        content_length = -1
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                auth_header = value
+            elif name == b"x-mcp-scope":
+                scope_header = value
+            elif name == b"accept":
+                accept = value
+            elif name == b"content-length" and value.isdigit():
+                content_length = int(value)
+        # Read once: a concurrent reload must not change config mid-request.
+        access = self.access.current if self.access is not None else self._static_access
+        principal = access.credentials.authenticate(auth_header)
+        if principal is None:
             await _send_jsonrpc_error(
                 send,
-                request_id,
+                None,
                 401,
                 "unauthorized",
                 {"detail": "missing or invalid bearer token"},
             )
             return
+        scope_name = scope_header.decode("latin-1")
+        if not principal.grants(scope_name):
+            await _send_jsonrpc_error(
+                send,
+                None,
+                403,
+                "forbidden",
+                {"detail": f"token is not granted scope '{scope_name}'"},
+            )
+            return
+        if content_length > self.max_body_bytes:
+            await _send_body_too_large(send, self.max_body_bytes)
+            return
+        mark = record_stage("auth", mark)
+
+        body = await _read_body(receive, self.max_body_bytes)
+        if body is None:
+            await _send_body_too_large(send, self.max_body_bytes)
+            return
+        mark = record_stage("read_body", mark)
+        try:
+            request = json.loads(body) if body else {}
+        except ValueError:
+            await _send_jsonrpc_error(send, None, 400, "parse_error", {"detail": "invalid JSON"})
+            return
+        mark = record_stage("parse", mark)
+        if isinstance(request, list):
+            await self._handle_batch(scope, request, access.policy, scope_name, send)
+            return
+        if not isinstance(request, dict):
+            request = {}
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params")
+        if not isinstance(params, dict):
+            params = {}
 
         action = _action_from_request(method, params)
         if action:
-            decision = self.policy.allows(scope_header or "", action)
+            decision = access.policy.allows(scope_name, action)
             if not decision.allowed:
                 await _send_jsonrpc_error(
                     send,
@@ -175,26 +436,186 @@ class AuthPolicyMiddleware:
                 {"detail": "action not allowed"},
             )
             return
+        mark = record_stage("policy", mark)
 
-        async def buffered_receive() -> dict[str, Any]:
-            return {"type": "http.request", "body": body, "more_body": False}
+        if self.admission is not None:
+            rejection = self.admission.admit(scope_name, action)
+            if rejection is not None:
+                await _send_jsonrpc_error(
+                    send,
+                    request_id,
+                    rejection.status,
+                    rejection.message,
+                    {"detail": "retry later", "retry_after_s": rejection.retry_after_s},
+                    headers=[(b"retry-after", _retry_after(rejection.retry_after_s))],
+                )
+                return
+            record_stage("admission", mark)
+        started = time.perf_counter()
+        try:
+            if (
+                self.audit_adapter is not None
+                and action == "audit.query"
+                and NDJSON_BYTES in accept
+            ):
+                await _stream_audit_query(
+                    send,
+                    self.audit_adapter,
+                    self.executor,
+                    request_id,
+                    params.get("arguments") or {},
+                )
+                return
 
-        await self.app(scope, buffered_receive, send)
+            # The envelope is parsed here only for auth, policy and admission;
+            # the MCP app cannot take it pre-parsed and decodes the body again.
+            async def buffered_receive() -> dict[str, Any]:
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            await self.app(scope, buffered_receive, send)
+        finally:
+            if self.admission is not None:
+                self.admission.release(action, (time.perf_counter() - started) * 1000)
+
+    async def _handle_batch(
+        self,
+        scope: dict[str, Any],
+        batch: list[Any],
+        policy: ScopePolicy,
+        scope_name: str,
+        send: Send,
+    ) -> None:
+        if not batch or len(batch) > MAX_BATCH_REQUESTS:
+            detail = f"batch must hold 1 to {MAX_BATCH_REQUESTS} requests"
+            await _send_jsonrpc_error(send, None, 400, "invalid_request", {"detail": detail})
+            return
+        # Every element is authorized on its own; denied ones get an error
+        # entry while the rest run concurrently against the MCP app.
+        replies: list[dict[str, Any] | None] = [None] * len(batch)
+        calls = []
+        for position, element in enumerate(batch):
+            if not isinstance(element, dict):
+                replies[position] = _jsonrpc_error(
+                    None, 400, "invalid_request", {"detail": "batch entries must be objects"}
+                )
+                continue
+            params = element.get("params")
+            action = (
+                _action_from_request(
+                    element.get("method"), params if isinstance(params, dict) else {}
+                )
+                or ""
+            )
+            decision = (
+                policy.allows(scope_name, action)
+                if action
+                else PolicyDecision(allowed=False, reason="action not allowed")
+            )
+            if not decision.allowed:
+                replies[position] = _jsonrpc_error(
+                    element.get("id"), 403, "forbidden", {"detail": decision.reason}
+                )
+                continue
+            rejection = self.admission.admit(scope_name, action) if self.admission else None
+            if rejection is not None:
+                replies[position] = _jsonrpc_error(
+                    element.get("id"),
+                    rejection.status,
+                    rejection.message,
+                    {"detail": "retry later", "retry_after_s": rejection.retry_after_s},
+                )
+                continue
+            calls.append((position, action, self._dispatch_one(scope, element)))
+        started = time.perf_counter()
+        try:
+            # One failing call must not fail the batch or leave its siblings
+            # running unobserved; it becomes that element's error entry.
+            results = await asyncio.gather(*(call for _, _, call in calls), return_exceptions=True)
+        finally:
+            if self.admission is not None:
+                latency_ms = (time.perf_counter() - started) * 1000
+                for _, action, _ in calls:
+                    self.admission.release(action, latency_ms)
+        for (position, _, _), reply in zip(calls, results, strict=True):
+            if isinstance(reply, BaseException):
+                reply = _jsonrpc_error(
+                    batch[position].get("id"), 500, "internal_error", {"detail": str(reply)}
+                )
+            replies[position] = reply
+        # Notifications (no id) get no entry; a batch of only those gets none.
+        body = [
+            reply
+            for element, reply in zip(batch, replies, strict=True)
+            if reply is not None and not (isinstance(element, dict) and "id" not in element)
+        ]
+        if not body:
+            await send({"type": "http.response.start", "status": 202, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": to_json(body)})
+
+    async def _dispatch_one(
+        self, scope: dict[str, Any], element: dict[str, Any]
+    ) -> dict[str, Any] | None:
+        # The MCP app only reads raw bodies, so each element is re-encoded.
+        body = to_json(element)
+        headers = [(k, v) for k, v in scope.get("headers", []) if k != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        sub_scope = {**scope, "headers": headers}
+        try:
+            reply = json.loads(await _call_app(self.app, sub_scope, body))
+        except ValueError:
+            reply = None
+        if not isinstance(reply, dict):
+            return _jsonrpc_error(
+                element.get("id"), 500, "internal_error", {"detail": "invalid response"}
+            )
+        return reply
 
-    def _authorized(self, auth_header: str) -> bool:
-        if not self.token:
-            return False
-        return auth_header == f"Bearer {self.token}"
 
+async def _call_app(app: ASGIApp, scope: dict[str, Any], body: bytes) -> bytes:
+    # Runs one buffered request through the app and returns the response body.
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
 
-async def _read_body(receive: Receive) -> bytes:
+    async def capture(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, capture)
+    return b"".join(chunks)
+
+
+async def _read_body(receive: Receive, max_bytes: int) -> bytes | None:
+    # Returns None as soon as the body grows past max_bytes.
     chunks: list[bytes] = []
+    size = 0
     more_body = True
     while more_body:
         message = await receive()
-        chunks.append(message.get("body", b""))
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
         more_body = message.get("more_body", False)
-    return b"".join(chunks)
+    # Single-chunk bodies, the common case, are passed on without a copy.
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+async def _send_body_too_large(send: Send, max_bytes: int) -> None:
+    await _send_jsonrpc_error(
+        send, None, 413, "payload_too_large", {"detail": f"body exceeds {max_bytes} bytes"}
+    )
 
 
 def _action_from_request(method: str | None, params: dict[str, Any]) -> str | None:
@@ -205,57 +626,325 @@ def _action_from_request(method: str | None, params: dict[str, Any]) -> str | No
     return None
 
 
-async def _send_jsonrpc_error(
-    send: Send, request_id: Any, code: int, message: str, data: dict[str, Any]
-) -> None:
-    payload = {
+def _retry_after(seconds: float) -> bytes:
+    return str(max(1, math.ceil(seconds))).encode("latin-1")
+
+
+def _jsonrpc_error(
+    request_id: Any, code: int, message: str, data: dict[str, Any]
+) -> dict[str, Any]:
+    return {
         "jsonrpc": "2.0",
         "id": request_id,
         "error": ErrorResponse(code=code, message=message, data=data).model_dump(),
     }
-    body = json.dumps(payload).encode("utf-8")
+
+
+async def _send_jsonrpc_error(
+    send: Send,
+    request_id: Any,
+    code: int,
+    message: str,
+    data: dict[str, Any],
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> None:
+    body = json.dumps(_jsonrpc_error(request_id, code, message, data)).encode("utf-8")
     await send(
         {
             "type": "http.response.start",
             "status": code,
-            "headers": [(b"content-type", b"application/json")],
+            "headers": [(b"content-type", b"application/json"), *(headers or [])],
         }
     )
     await send({"type": "http.response.body", "body": body})
 
 
-def create_http_app(server: Server, token: str, policy: ScopePolicy) -> ASGIApp:
+async def _stream_audit_query(
+    send: Send,
+    adapter: StreamingAuditAdapter,
+    executor: ToolExecutor,
+    request_id: Any,
+    arguments: dict[str, Any],
+) -> None:
+    # Rows go out as NDJSON chunks straight from the store scan, so memory
+    # stays bounded by one chunk whatever the result size. Every row carries
+    # the cursor that resumes after it; the last line carries next_cursor.
+    # The scan may load segment files from disk, so each chunk is pulled on
+    # the executor under the audit.query limit.
+    logger = get_logger(str(request_id), "audit.query")
+    with request_span("tool", "audit.query"):
+        logger.info("audit_query_stream")
+        try:
+            input_data = AuditQueryInput(**arguments)
+            rows = adapter.stream(
+                input_data.q,
+                filters=input_data.filters,
+                since=input_data.since,
+                until=input_data.until,
+                cursor=input_data.cursor,
+            )
+            # Pull the first row before the response starts so a bad cursor
+            # is still reported as an error.
+            first = await executor.run("audit.query", _take, rows, 1)
+        except (TypeError, ValueError) as exc:
+            await _send_jsonrpc_error(send, request_id, 400, "invalid_params", {"detail": str(exc)})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", NDJSON_BYTES)],
+            }
+        )
+        remaining = input_data.limit
+        pending = itertools.chain(first, rows)
+        last_cursor = input_data.cursor
+        while remaining > 0:
+            chunk = await executor.run(
+                "audit.query", _take, pending, min(remaining, STREAM_CHUNK_ROWS)
+            )
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            last_cursor = chunk[-1][1]
+            body = b"".join(
+                to_json({"fields": row, "cursor": cursor}, fallback=str) + b"\n"
+                for row, cursor in chunk
+            )
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        exhausted = remaining > 0 or not await executor.run("audit.query", _take, pending, 1)
+        final = {"done": True, "next_cursor": None if exhausted else last_cursor}
+        await send(
+            {"type": "http.response.body", "body": (json.dumps(final) + "\n").encode("utf-8")}
+        )
+
+
+def _take(rows: Iterator[T], count: int) -> list[T]:
+    return list(itertools.islice(rows, count))
+
+
+def create_http_app(
+    server: Server,
+    token: str,
+    policy: ScopePolicy,
+    audit_adapter: StreamingAuditAdapter | None = None,
+    max_body_bytes: int = MAX_BODY_BYTES,
+    admission: AdmissionController | None = None,
+    access: AccessConfigFile | None = None,
+    executor: ToolExecutor | None = None,
+) -> ASGIApp:
+    from mcp.server.http import StreamableHTTPServer
+
     http_server = StreamableHTTPServer(server)
-    return AuthPolicyMiddleware(http_server.app, token=token, policy=policy)
+    return AuthPolicyMiddleware(
+        http_server.app,
+        token=token,
+        policy=policy,
+        audit_adapter=audit_adapter,
+        max_body_bytes=max_body_bytes,
+        admission=admission,
+        access=access,
+        executor=executor,
+    )
 
 
-async def run_stdio(server: Server) -> None:
-    async with stdio_server() as (read, write):
-        init_options: Any = {}
-        await server.run(read, write, initialization_options=init_options)
+@contextlib.contextmanager
+def _probing(probes: DependencyProbes | None) -> Iterator[None]:
+    # Dependency probes run for as long as the server serves; needs a running
+    # event loop.
+    if probes is not None:
+        probes.start()
+    try:
+        yield
+    finally:
+        if probes is not None:
+            probes.stop()
+
+
+async def run_stdio(server: Server, probes: DependencyProbes | None = None) -> None:
+    from mcp.server.stdio import stdio_server
+
+    # The SDK session already handles requests concurrently and acts on
+    # notifications/cancelled; the in-flight limit lives in create_server.
+    with _probing(probes):
+        async with stdio_server() as (read, write):
+            init_options: Any = {}
+            await server.run(read, write, initialization_options=init_options)
+
+
+def _http_app_from_env(
+    server: Server, audit_adapter: StreamingAuditAdapter | None, executor: ToolExecutor
+) -> ASGIApp:
+    access_path = os.getenv("MCP_ACCESS_FILE", "")
+    access = AccessConfigFile(access_path) if access_path else None
+    if access is not None:
+        access.start()
+    return create_http_app(
+        server,
+        token=os.getenv("MCP_BEARER_TOKEN", ""),
+        policy=ScopePolicy(),
+        audit_adapter=audit_adapter,
+        max_body_bytes=int(os.getenv("MCP_MAX_BODY_BYTES", str(MAX_BODY_BYTES))),
+        admission=AdmissionController(
+            max_in_flight=int(os.getenv("MCP_MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT))),
+            scope_rates=parse_rate_limits(os.getenv("MCP_SCOPE_RATE_LIMITS", "")),
+            tool_rates=parse_rate_limits(os.getenv("MCP_TOOL_RATE_LIMITS", "")),
+            target_latency_ms=float(os.getenv("MCP_ADAPTIVE_TARGET_MS", "0")) or None,
+        ),
+        access=access,
+        executor=executor,
+    )
 
 
-async def run_http(server: Server) -> None:
-    token = os.getenv("MCP_BEARER_TOKEN", "")
-    policy = ScopePolicy()
-    app = create_http_app(server, token=token, policy=policy)
+async def run_http(
+    server: Server,
+    audit_adapter: StreamingAuditAdapter | None = None,
+    executor: ToolExecutor | None = None,
+    probes: DependencyProbes | None = None,
+) -> None:
+    from mcp.server.http import StreamableHTTPServer
+
+    app = _http_app_from_env(server, audit_adapter, executor or ToolExecutor())
     http_server = StreamableHTTPServer(server, app=app)
-    await http_server.serve(host="0.0.0.0", port=int(os.getenv("MCP_HTTP_PORT", "8080")))
+    with _probing(probes):
+        await http_server.serve(host="0.0.0.0", port=int(os.getenv("MCP_HTTP_PORT", "8080")))
 
 
-def main() -> None:
-    configure_logging()
-    configure_tracing()
-    start_http_server(int(os.getenv("MCP_METRICS_PORT", "8001")))
+def build_server(
+    max_in_flight: int | None = None,
+) -> tuple[Server, StreamingAuditAdapter | None, ToolExecutor, DependencyProbes]:
+    # The executor is returned so the HTTP app's NDJSON path shares its
+    # per-tool limits with the MCP tools, and the probes so the transport
+    # starts them once its event loop runs.
     version = os.getenv("MCP_VERSION", "0.1.0")
-    kb_adapter = default_kb_adapter()
-    audit_adapter = default_audit_adapter()
-    server = create_server(kb_adapter, audit_adapter, version)
+    segment_paths = [p for p in os.getenv("MCP_KB_SEGMENTS", "").split(os.pathsep) if p]
+    kb_url = os.getenv("MCP_KB_URL", "")
+    audit_url = os.getenv("MCP_AUDIT_URL", "")
+    kb_adapter: KBAdapter | AsyncKBAdapter
+    audit_adapter: AuditAdapter | AsyncAuditAdapter
+    streaming_audit: StreamingAuditAdapter | None = None
+    if kb_url or audit_url:
+        from mcp_cp.remote import HTTPAuditAdapter, HTTPKBAdapter, create_http_client
+
+        http_client = create_http_client()
+        if kb_url:
+            kb_adapter = HTTPKBAdapter(http_client, kb_url)
+        if audit_url:
+            audit_adapter = HTTPAuditAdapter(http_client, audit_url)
+    if not kb_url:
+        indexed = default_kb_adapter(segment_paths)
+        indexed.index.start_compaction(float(os.getenv("MCP_KB_COMPACTION_INTERVAL_S", "60")))
+        kb_adapter = indexed
+    if not audit_url:
+        audit_adapter = streaming_audit = default_audit_adapter(os.getenv("MCP_AUDIT_DIR") or None)
+    executor = ToolExecutor(
+        max_workers=int(os.getenv("MCP_EXECUTOR_WORKERS", "8")),
+        tool_limits=parse_tool_limits(os.getenv("MCP_TOOL_CONCURRENCY", "")),
+    )
+    cache_entries = int(os.getenv("MCP_CACHE_MAX_ENTRIES", "1024"))
+    cache = (
+        TTLCache(cache_entries, float(os.getenv("MCP_CACHE_TTL_S", "30")))
+        if cache_entries > 0
+        else None
+    )
+    probes = DependencyProbes(
+        {"kb": kb_adapter.probe, "audit": audit_adapter.probe},
+        interval_s=float(os.getenv("MCP_PROBE_INTERVAL_S", str(DEFAULT_PROBE_INTERVAL_S))),
+        timeout_s=float(os.getenv("MCP_PROBE_TIMEOUT_S", str(DEFAULT_PROBE_TIMEOUT_S))),
+    )
+    server = create_server(
+        kb_adapter, audit_adapter, version, executor, cache, probes, max_in_flight
+    )
+    return server, streaming_audit, executor, probes
+
+
+def _configure_logging_from_env() -> None:
+    configure_logging(
+        sample_rates=parse_sample_rates(os.getenv("MCP_LOG_SAMPLE_RATES", "")),
+        default_sample_rate=float(os.getenv("MCP_LOG_SAMPLE_RATE", "1.0")),
+        queue_size=int(os.getenv("MCP_LOG_QUEUE_SIZE", "10000")),
+    )
+
+
+def _configure_tracing_from_env() -> None:
+    slow_ms = os.getenv("MCP_TRACE_SLOW_MS")
+    configure_tracing(
+        mode=os.getenv("MCP_TRACE_MODE", "otlp"),
+        sample_ratio=float(os.getenv("MCP_TRACE_SAMPLE_RATIO", "1.0")),
+        slow_ms=float(slow_ms) if slow_ms else None,
+    )
+
+
+def _start_profiling_from_env(port_offset: int = 0) -> None:
+    # Workers each serve their own profiling endpoint, on consecutive ports.
+    token = os.getenv("MCP_ADMIN_TOKEN", "")
+    if token:
+        from mcp_cp.profiling import start_profiling_server
+
+        start_profiling_server(int(os.getenv("MCP_ADMIN_PORT", "8002")) + port_offset, token)
+
+
+def run_http_worker(index: int, host: str, port: int) -> None:
+    # Entry point of each spawned HTTP worker: a full server of its own,
+    # listening on a SO_REUSEPORT socket shared by port with its siblings.
+    import uvicorn
+
+    from mcp_cp.workers import bind_reuseport
+
+    _configure_logging_from_env()
+    _configure_tracing_from_env()
+    _start_profiling_from_env(index)
+    server, streaming_audit, executor, probes = build_server()
+    # Lifespan events reach the MCP app through the middleware; its startup
+    # runs the session manager the single-worker server also starts.
+    config = uvicorn.Config(
+        _http_app_from_env(server, streaming_audit, executor), lifespan="on", log_config=None
+    )
+
+    async def serve() -> None:
+        with _probing(probes):
+            await uvicorn.Server(config).serve(sockets=[bind_reuseport(host, port)])
+
+    asyncio.run(serve())
+
+
+def run_http_workers(workers: int) -> None:
+    from mcp_cp.workers import supervise
+
+    if os.getenv("MCP_AUDIT_DIR"):
+        # Each worker would open its own writer on the same segment files.
+        raise SystemExit("MCP_AUDIT_DIR needs MCP_HTTP_WORKERS=1; use MCP_AUDIT_URL instead")
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not metrics_dir:
+        metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(
+            prefix="mcp-metrics-"
+        )
+    # Samples left by a previous run would be summed into this one.
+    for stale in Path(metrics_dir).glob("*.db"):
+        stale.unlink()
+    start_metrics_server(int(os.getenv("MCP_METRICS_PORT", "8001")))
+    port = int(os.getenv("MCP_HTTP_PORT", "8080"))
+    supervise(run_http_worker, workers, args=("0.0.0.0", port), on_exit=mark_worker_dead)
+
+
+def main() -> None:
+    _configure_logging_from_env()
     mode = os.getenv("MCP_MODE", "stdio")
+    workers = int(os.getenv("MCP_HTTP_WORKERS", "1"))
+    if mode == "http" and workers > 1:
+        run_http_workers(workers)
+        return
+    _configure_tracing_from_env()
+    start_metrics_server(int(os.getenv("MCP_METRICS_PORT", "8001")))
+    _start_profiling_from_env()
     if mode == "http":
-        asyncio.run(run_http(server))
+        server, streaming_audit, executor, probes = build_server()
+        asyncio.run(run_http(server, streaming_audit, executor, probes))
     else:
-        asyncio.run(run_stdio(server))
+        # HTTP requests are bounded by admission control instead.
+        max_in_flight = int(os.getenv("MCP_STDIO_MAX_IN_FLIGHT", str(STDIO_MAX_IN_FLIGHT)))
+        server, _streaming_audit, _executor, probes = build_server(max_in_flight)
+        asyncio.run(run_stdio(server, probes))
 
 
 if __name__ == "__main__":
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import os
+import random
 import time
 from collections.abc import Iterator
 from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cache
 
-from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from prometheus_client import Counter, Histogram
+from opentelemetry import context, trace
+from opentelemetry.trace import Span, StatusCode
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
 
 SERVICE_NAME = "mcp-control-plane"
 
@@ -21,35 +30,179 @@ request_latency_ms = Histogram(
     buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2000),
 )
 tool_error_count = Counter("tool_error_count", "Tool errors", ["tool"])
+stage_latency_ms = Histogram(
+    "stage_latency_ms",
+    "Latency per request stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000),
+)
+# Gauges are summed over live workers when metrics are multiprocess.
+executor_queue_depth = Gauge(
+    "executor_queue_depth",
+    "Tool calls waiting for an executor slot",
+    ["tool"],
+    multiprocess_mode="livesum",
+)
+executor_active = Gauge(
+    "executor_active",
+    "Tool calls running on the executor",
+    ["tool"],
+    multiprocess_mode="livesum",
+)
+shed_requests = Counter("shed_requests", "Calls rejected by admission control", ["tool", "reason"])
+admission_in_flight = Gauge(
+    "admission_in_flight", "Admitted calls in flight", multiprocess_mode="livesum"
+)
+admission_limit = Gauge(
+    "admission_limit", "Current in-flight limit per worker", multiprocess_mode="livemax"
+)
+coalesced_calls = Counter(
+    "coalesced_calls", "Tool calls served by an identical in-flight call", ["tool"]
+)
+cache_hits = Counter("cache_hits", "Response cache hits", ["tool"])
+cache_misses = Counter("cache_misses", "Response cache misses", ["tool"])
+cache_evictions = Counter("cache_evictions", "Response cache evictions", ["tool", "reason"])
+logs_dropped = Counter(
+    "logs_dropped", "Log records sampled out or dropped on a full queue", ["reason"]
+)
+dependency_probe_latency_ms = Histogram(
+    "dependency_probe_latency_ms",
+    "Latency of background dependency probes",
+    ["dependency", "status"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+dependency_up = Gauge(
+    "dependency_up",
+    "1 when the last probe of a dependency succeeded",
+    ["dependency"],
+    multiprocess_mode="livemin",
+)
+
+
+def start_metrics_server(port: int) -> None:
+    # With PROMETHEUS_MULTIPROC_DIR set, worker processes write their samples
+    # to files in that directory and this exporter aggregates them.
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    start_http_server(port, registry=registry)
+
+
+def mark_worker_dead(pid: int) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)  # type: ignore[no-untyped-call]
+
 
+@dataclass(frozen=True)
+class TraceSampling:
+    # Head sampling keeps `ratio` of requests; with `enabled` off only metrics
+    # are recorded. Unsampled requests that fail or take at least `slow_ms`
+    # are traced anyway, from a span built once the outcome is known.
+    enabled: bool = True
+    ratio: float = 1.0
+    slow_ms: float | None = None
+
+
+_sampling = TraceSampling()
+_tracer = trace.get_tracer(__name__)
+
+
+def configure_tracing(
+    mode: str = "otlp", sample_ratio: float = 1.0, slow_ms: float | None = None
+) -> None:
+    # mode "metrics" installs no tracer provider at all.
+    global _sampling
+    if mode == "metrics":
+        _sampling = TraceSampling(enabled=False)
+        return
+    # The SDK and the gRPC exporter take most of this module's import time, so
+    # they load only when traces are exported.
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
-def configure_tracing() -> None:
     resource = Resource.create({"service.name": SERVICE_NAME})
     provider = TracerProvider(resource=resource)
     exporter = OTLPSpanExporter()
     provider.add_span_processor(BatchSpanProcessor(exporter))
     trace.set_tracer_provider(provider)
+    _sampling = TraceSampling(ratio=sample_ratio, slow_ms=slow_ms)
+
+
+@cache
+def _stage_histogram(stage: str) -> Histogram:
+    return stage_latency_ms.labels(stage=stage)
+
+
+def record_stage(stage: str, start: float) -> float:
+    # Observes the time since `start` (a perf_counter value) and returns the
+    # current time, which starts the next stage.
+    now = time.perf_counter()
+    _stage_histogram(stage).observe((now - start) * 1000)
+    return now
+
+
+def record_probe(dependency: str, status: str, start: float) -> None:
+    dependency_probe_latency_ms.labels(dependency=dependency, status=status).observe(
+        (time.perf_counter() - start) * 1000
+    )
+    dependency_up.labels(dependency=dependency).set(1 if status == "ok" else 0)
+
+
+@cache
+def _request_metrics(method: str, tool_name: str) -> tuple[Counter, Histogram, Counter]:
+    return (
+        request_count.labels(method=method, tool=tool_name),
+        request_latency_ms.labels(method=method, tool=tool_name),
+        tool_error_count.labels(tool=tool_name),
+    )
 
 
 @contextmanager
 def request_span(method: str, tool_name: str) -> Iterator[dict[str, float]]:
-    tracer = trace.get_tracer(__name__)
     start = time.perf_counter()
-    with tracer.start_as_current_span("mcp.request") as span:
-        span.set_attribute("mcp.method", method)
-        span.set_attribute("tool.name", tool_name)
-        outcome = "success"
-        try:
-            yield {"start": start}
-        except Exception:
-            outcome = "error"
-            span.set_attribute("outcome", outcome)
-            raise
-        finally:
-            latency_ms = (time.perf_counter() - start) * 1000
-            span.set_attribute("latency_ms", latency_ms)
-            span.set_attribute("outcome", outcome)
-            request_count.labels(method=method, tool=tool_name).inc()
-            request_latency_ms.labels(method=method, tool=tool_name).observe(latency_ms)
-            if outcome == "error":
-                tool_error_count.labels(tool=tool_name).inc()
+    sampling = _sampling
+    span: Span | None = None
+    token = None
+    if sampling.enabled and (sampling.ratio >= 1.0 or random.random() < sampling.ratio):
+        span = _tracer.start_span(
+            "mcp.request", attributes={"mcp.method": method, "tool.name": tool_name}
+        )
+        token = context.attach(trace.set_span_in_context(span))
+    outcome = "success"
+    try:
+        yield {"start": start}
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        if token is not None:
+            context.detach(token)
+        if span is not None:
+            _end_span(span, latency_ms, outcome)
+        elif sampling.enabled and (
+            outcome == "error" or (sampling.slow_ms is not None and latency_ms >= sampling.slow_ms)
+        ):
+            end_ns = time.time_ns()
+            span = _tracer.start_span(
+                "mcp.request",
+                attributes={"mcp.method": method, "tool.name": tool_name},
+                start_time=end_ns - int(latency_ms * 1_000_000),
+            )
+            _end_span(span, latency_ms, outcome, end_ns)
+        count, latency, errors = _request_metrics(method, tool_name)
+        count.inc()
+        latency.observe(latency_ms)
+        if outcome == "error":
+            errors.inc()
+
+
+def _end_span(span: Span, latency_ms: float, outcome: str, end_ns: int | None = None) -> None:
+    if span.is_recording():
+        span.set_attributes({"latency_ms": latency_ms, "outcome": outcome})
+        if outcome == "error":
+            span.set_status(StatusCode.ERROR)
+    span.end(end_ns)
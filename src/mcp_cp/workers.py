@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from typing import Any
+
+RESTART_BACKOFF_S = 1.0
+SHUTDOWN_GRACE_S = 10.0
+
+logger = logging.getLogger("mcp_cp")
+
+
+def bind_reuseport(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    # Every worker binds its own listener on the same port; with SO_REUSEPORT
+    # the kernel spreads incoming connections across them.
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def supervise(
+    target: Callable[..., None],
+    workers: int,
+    args: tuple[Any, ...] = (),
+    on_exit: Callable[[int], None] | None = None,
+) -> None:
+    # Runs target(index, *args) in `workers` spawned processes and restarts any
+    # that die until SIGTERM/SIGINT, which is forwarded to every worker.
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+
+    def start(index: int) -> BaseProcess:
+        process = context.Process(
+            target=target, args=(index, *args), name=f"mcp-worker-{index}", daemon=False
+        )
+        process.start()
+        return process
+
+    def stop(signum: int, frame: FrameType | None) -> None:
+        stopping.set()
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    processes = {index: start(index) for index in range(workers)}
+    try:
+        while not stopping.wait(0.5):
+            for index, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                logger.warning(
+                    "worker %s (pid %s) exited with %s", index, process.pid, process.exitcode
+                )
+                if on_exit is not None and process.pid is not None:
+                    on_exit(process.pid)
+                time.sleep(RESTART_BACKOFF_S)
+                if not stopping.is_set():
+                    processes[index] = start(index)
+    finally:
+        for process in processes.values():
+            process.terminate()
+        deadline = time.monotonic() + SHUTDOWN_GRACE_S
+        for process in processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+            if on_exit is not None and process.pid is not None:
+                on_exit(process.pid)
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
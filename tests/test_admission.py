@@ -0,0 +1,48 @@
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.admission import AdaptiveLimit, AdmissionController, parse_rate_limits
+
+    return AdmissionController, AdaptiveLimit, parse_rate_limits
+
+
+def test_rate_limits_and_in_flight_limit_shed_but_exempt_tools_pass(monkeypatch: Any) -> None:
+    AdmissionController, _AdaptiveLimit, parse_rate_limits = _imports()
+    now = [0.0]
+    monkeypatch.setattr("mcp_cp.admission.time.monotonic", lambda: now[0])
+    controller = AdmissionController(max_in_flight=2, scope_rates=parse_rate_limits("audit=1:2"))
+    assert controller.admit("audit", "audit.query") is None
+    assert controller.admit("audit", "audit.query") is None
+    rejection = controller.admit("audit", "audit.query")
+    assert (rejection.status, rejection.message, rejection.retry_after_s) == (
+        429,
+        "rate_limited",
+        1.0,
+    )
+    assert controller.admit("read", "kb.search").status == 503
+    assert controller.admit("read", "health.check") is None
+
+    controller.release("audit.query", 5.0)
+    now[0] = 1.0
+    assert controller.admit("read", "kb.search") is None
+
+
+def test_adaptive_limit_backs_off_on_latency_and_recovers(monkeypatch: Any) -> None:
+    _AdmissionController, AdaptiveLimit, _parse_rate_limits = _imports()
+    now = [0.0]
+    monkeypatch.setattr("mcp_cp.admission.time.monotonic", lambda: now[0])
+    limit = AdaptiveLimit(limit=100.0, target_ms=50.0, max_limit=100.0, smoothing=1.0)
+    for _ in range(5):
+        limit.observe(500.0)
+    assert limit.limit == pytest.approx(90.0)  # one decrease per cooldown
+    now[0] = 2.0
+    limit.observe(500.0)
+    assert limit.limit == pytest.approx(81.0)
+    for _ in range(200):
+        limit.observe(10.0)
+    assert 81.0 < limit.limit <= 100.0
@@ -0,0 +1,114 @@
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("pydantic")
+    from mcp_cp.adapters import ColumnarAuditAdapter
+    from mcp_cp.audit_store import AuditFilter, AuditStore
+
+    return ColumnarAuditAdapter, AuditFilter, AuditStore
+
+
+ROWS = [
+    {"timestamp": 100.0, "event": "login", "user": "alice", "status": "ok"},
+    {"timestamp": 200.0, "event": "login", "user": "bob", "status": "denied"},
+    {"timestamp": 4000.0, "event": "deploy", "user": "alice", "tags": ["prod"]},
+    {"timestamp": 8000.0, "event": "logout", "user": "carol", "status": "ok"},
+]
+
+
+def test_columnar_adapter_free_text_and_filters() -> None:
+    ColumnarAuditAdapter, _AuditFilter, _AuditStore = _imports()
+    adapter = ColumnarAuditAdapter(rows=ROWS)
+    assert [r.fields["user"] for r in adapter.query("LOGIN", limit=10).rows] == ["alice", "bob"]
+    assert [r.fields["event"] for r in adapter.query("prod", limit=10).rows] == ["deploy"]
+    rows = adapter.query("", limit=10, filters={"user": "alice"}).rows
+    assert [r.fields["event"] for r in rows] == ["login", "deploy"]
+    rows = adapter.query("ok", limit=10, since=150.0, until=9000.0).rows
+    assert [r.fields["user"] for r in rows] == ["carol"]
+    assert "tags" not in adapter.query("logout", limit=1).rows[0].fields
+    assert len(adapter.query("", limit=2).rows) == 2
+
+
+def test_partitions_are_pruned_without_scanning_rows() -> None:
+    _ColumnarAuditAdapter, AuditFilter, AuditStore = _imports()
+    store = AuditStore(partition_seconds=3600)
+    store.extend(ROWS)
+    first, second, third = store.partitions()
+    assert (first.row_count, second.row_count, third.row_count) == (2, 1, 1)
+    assert list(first.scan(AuditFilter(since=5000.0))) == []
+    assert list(first.scan(AuditFilter(equals={"user": "carol"}))) == []
+    assert list(first.scan(AuditFilter(q="deploy"))) == []
+    assert list(first.scan(AuditFilter(equals={"status": "denied"}))) == [1]
+
+
+def test_audit_log_rotates_segments_and_recovers(tmp_path: Any) -> None:
+    ColumnarAuditAdapter, AuditFilter, _AuditStore = _imports()
+    from mcp_cp.audit_log import AuditLog
+
+    log = AuditLog(tmp_path, segment_max_bytes=200, resident_segments=1)
+    for row in ROWS:
+        log.append(row, durable=True)
+    log.extend([{"timestamp": 9000.0 + i, "event": "bulk", "n": i} for i in range(50)])
+    log.flush()
+    assert len(log.segments()) >= 2
+    assert len(log._resident) == 1
+    adapter = ColumnarAuditAdapter(store=log)
+    assert [r.fields["user"] for r in adapter.query("login", limit=10).rows] == ["alice", "bob"]
+    assert len(log.query(AuditFilter(equals={"event": "bulk"}), limit=100)) == 50
+    log.close()
+
+    reopened = AuditLog(tmp_path)
+    rows = reopened.query(AuditFilter(since=4000.0, until=9001.0), limit=10)
+    assert [row["event"] for row in rows] == ["deploy", "logout", "bulk"]
+    reopened.close()
+
+
+def test_audit_log_rejects_appends_after_writer_failure(tmp_path: Any, monkeypatch: Any) -> None:
+    ColumnarAuditAdapter, _AuditFilter, _AuditStore = _imports()
+    import errno
+    import os
+
+    from mcp_cp.audit_log import AuditLog
+
+    def full(fd: int) -> None:
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    log = AuditLog(tmp_path, max_pending_rows=2)
+    monkeypatch.setattr(os, "fsync", full)
+    with pytest.raises(OSError):
+        log.append(ROWS[0], durable=True)
+    # Neither a non-durable append nor one past the backpressure limit may
+    # be silently dropped or block.
+    for _ in range(3):
+        with pytest.raises(OSError):
+            log.append(ROWS[1])
+    with pytest.raises(OSError):
+        ColumnarAuditAdapter(store=log).probe()
+
+
+def test_cursor_pages_resume_after_last_row(tmp_path: Any) -> None:
+    ColumnarAuditAdapter, _AuditFilter, _AuditStore = _imports()
+    from mcp_cp.audit_log import AuditLog
+
+    log = AuditLog(tmp_path, segment_max_bytes=200)
+    rows = [{"timestamp": 100.0 * i, "event": "bulk", "n": i} for i in range(30)]
+    for adapter in (ColumnarAuditAdapter(rows=rows), ColumnarAuditAdapter(rows=rows, store=log)):
+        log.flush()
+        seen: list[int] = []
+        cursor = None
+        while True:
+            page = adapter.query("bulk", limit=7, cursor=cursor)
+            seen.extend(r.fields["n"] for r in page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert seen == list(range(30))
+        streamed = list(adapter.stream("bulk", cursor=adapter.query("bulk", 3).next_cursor))
+        assert [row["n"] for row, _ in streamed] == list(range(3, 30))
+        assert adapter.query("", limit=30).next_cursor is None
+    with pytest.raises(ValueError):
+        ColumnarAuditAdapter(rows=rows).query("", limit=1, cursor="not-a-cursor")
+    log.close()
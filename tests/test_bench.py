@@ -0,0 +1,71 @@
+import random
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("pydantic")
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.adapters import default_audit_adapter, default_kb_adapter
+    from mcp_cp.bench import build_corpus, compare, make_request, percentile
+
+    return (
+        default_audit_adapter,
+        default_kb_adapter,
+        build_corpus,
+        compare,
+        make_request,
+        percentile,
+    )
+
+
+def test_synthetic_corpus_is_served_and_reused(tmp_path: Path) -> None:
+    default_audit_adapter, default_kb_adapter, build_corpus, _compare, make_request, _p = _imports()
+    corpus = build_corpus(tmp_path, docs=50, audit_rows=200, seed=7)
+    assert build_corpus(tmp_path, docs=50, audit_rows=200, seed=7) == corpus
+
+    rng = random.Random(7)
+    search = make_request("kb.search", corpus, rng)["params"]["arguments"]
+    kb = default_kb_adapter(corpus.segment_paths)
+    assert kb.search(search["query"], search["top_k"]).results
+    assert kb.get_document("doc-49").metadata.id == "doc-49"
+    audit = default_audit_adapter(corpus.audit_dir)
+    assert len(audit.query("", 1000, filters={"status": "ok"}).rows) > 150
+
+
+def test_percentiles_and_regression_report() -> None:
+    *_, compare, _make_request, percentile = _imports()
+    latencies = [float(n) for n in range(1, 1001)]
+    assert (percentile(latencies, 0.5), percentile(latencies, 0.99)) == (500.0, 990.0)
+    assert percentile(latencies, 0.999) == 999.0
+
+    def report(p99_ms: float, throughput_rps: float) -> dict[str, Any]:
+        result = {"transport": "http", "tool": "kb.search", "p99_ms": p99_ms}
+        return {"results": [{**result, "throughput_rps": throughput_rps}]}
+
+    assert compare(report(10.0, 1000.0), report(11.0, 900.0), 0.2) == []
+    assert compare(report(10.0, 1000.0), report(13.0, 700.0), 0.2) == [
+        "http kb.search: p99 10.0ms -> 13.0ms",
+        "http kb.search: throughput 1000.0/s -> 700.0/s",
+    ]
+
+
+def test_reused_corpus_is_served_from_an_audit_copy(tmp_path: Path) -> None:
+    default_audit_adapter, *_ = _imports()
+    from mcp_cp.audit_log import AuditLog
+    from mcp_cp.bench import build_corpus, with_audit_copy
+
+    corpus = build_corpus(tmp_path / "corpus", docs=5, audit_rows=20, seed=7)
+    copy = with_audit_copy(corpus, tmp_path / "run")
+    log = AuditLog(copy.audit_dir)
+    try:
+        log.extend([{"event": "bench"}])
+        log.flush()
+    finally:
+        log.close()
+    for directory, expected in ((copy.audit_dir, 1), (corpus.audit_dir, 0)):
+        audit = default_audit_adapter(directory)
+        assert len(audit.query("", 100, filters={"event": "bench"}).rows) == expected
@@ -0,0 +1,56 @@
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.cache import TTLCache, normalize_query
+
+    return TTLCache, normalize_query
+
+
+def test_ttl_cache_evicts_by_size_expiry_and_invalidation(monkeypatch: Any) -> None:
+    TTLCache, normalize_query = _imports()
+    now = [0.0]
+    monkeypatch.setattr("mcp_cp.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=2, ttl_s=10.0)
+    search = ("kb.search", normalize_query("  Disk  FULL "), 5)
+    assert search == ("kb.search", "disk full", 5)
+    cache.set(search, {"results": []}, cache.generation())
+    cache.set(("kb.resource", "a"), {"id": "a"}, cache.generation())
+    assert cache.get(("kb.search", "disk full", 5)) == {"results": []}
+    cache.set(("kb.resource", "b"), {"id": "b"}, cache.generation())
+    assert cache.get(("kb.resource", "a")) is None  # least recently used
+    assert cache.get(search) is not None
+
+    cache.invalidate_tool("kb.search")
+    assert cache.get(search) is None
+    assert cache.get(("kb.resource", "b")) == {"id": "b"}
+
+    # A result computed across an invalidation is not stored.
+    generation = cache.generation()
+    cache.invalidate(("kb.resource", "b"))
+    cache.set(("kb.resource", "b"), {"id": "stale"}, generation)
+    assert cache.get(("kb.resource", "b")) is None
+
+    cache.set(search, {"results": []}, cache.generation())
+    now[0] = 11.0
+    assert cache.get(search) is None
+
+
+def test_indexed_adapter_notifies_document_changes() -> None:
+    pytest.importorskip("pydantic")
+    from mcp_cp.adapters import IndexedKBAdapter
+    from mcp_cp.models import DocumentMetadata, DocumentResource
+
+    adapter = IndexedKBAdapter(documents={})
+    changed: list[str] = []
+    adapter.subscribe(changed.append)
+    adapter.upsert(
+        DocumentResource(metadata=DocumentMetadata(id="doc", title="Doc"), content="text")
+    )
+    assert adapter.delete("doc")
+    assert not adapter.delete("doc")
+    assert changed == ["doc", "doc"]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from typing import Any
+
+import pytest
+
+pytest.importorskip("pytest_asyncio")
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.execution import SingleFlight, ToolExecutor, parse_tool_limits
+
+    return SingleFlight, ToolExecutor, parse_tool_limits
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_slow_sync_tool_does_not_block_loop_or_exceed_limit() -> None:
+    _SingleFlight, ToolExecutor, parse_tool_limits = _imports()
+    executor = ToolExecutor(max_workers=4, tool_limits=parse_tool_limits("slow=2"))
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow(value: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return value
+
+    async def fast() -> str:
+        return "ok"
+
+    started = time.perf_counter()
+    calls = asyncio.gather(*(executor.run("slow", slow, i) for i in range(6)))
+    assert await executor.run("fast", fast) == "ok"
+    assert time.perf_counter() - started < 0.05
+    assert await calls == list(range(6))
+    assert peak == 2
+    executor.shutdown()
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_single_flight_coalesces_identical_calls() -> None:
+    SingleFlight, _ToolExecutor, _parse_tool_limits = _imports()
+    flights = SingleFlight()
+    calls = 0
+
+    async def search() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"calls": calls}
+
+    key = ("kb.search", "disk full", 5)
+    results = await asyncio.gather(*(flights.do(key, search) for _ in range(10)))
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+
+    # A cancelled caller leaves the shared call running for the others.
+    first = asyncio.ensure_future(flights.do(key, search))
+    second = asyncio.ensure_future(flights.do(key, search))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == {"calls": 2}
+    assert await flights.do(("kb.search", "other", 5), search) == {"calls": 3}
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry")
+    from mcp_cp.health import DependencyProbes
+    from mcp_cp.telemetry import dependency_up
+
+    return DependencyProbes, dependency_up
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_probes_are_cached_and_refreshed_in_background() -> None:
+    DependencyProbes, dependency_up = _imports()
+    calls = 0
+    healthy = True
+
+    def kb() -> None:
+        nonlocal calls
+        calls += 1
+        if not healthy:
+            raise ConnectionError("kb down")
+
+    async def audit() -> None:
+        await asyncio.sleep(10)
+
+    probes = DependencyProbes({"kb": kb, "audit": audit}, interval_s=0.05, timeout_s=0.05)
+    # Nothing waits for the first round.
+    assert probes.snapshot() == {"kb": "unknown", "audit": "unknown"}
+    probes.start()
+    probes.start()
+    try:
+        await asyncio.sleep(0.08)
+        assert probes.snapshot() == {"kb": "ok", "audit": "timeout"}
+        assert dependency_up.labels(dependency="audit")._value.get() == 0
+        # Served from memory: no probe runs for the call itself.
+        before = calls
+        probes.snapshot()
+        assert calls == before
+
+        healthy = False
+        await asyncio.sleep(0.2)
+        assert probes.snapshot()["kb"] == "error"
+    finally:
+        probes.stop()
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_hung_sync_probe_is_not_started_again() -> None:
+    DependencyProbes, _dependency_up = _imports()
+    release = threading.Event()
+    calls = 0
+
+    def kb() -> None:
+        nonlocal calls
+        calls += 1
+        release.wait(5)
+
+    probes = DependencyProbes({"kb": kb}, timeout_s=0.02)
+    await probes.refresh()
+    await probes.refresh()
+    assert probes.statuses == {"kb": "timeout"}
+    assert calls == 1
+
+    release.set()
+    await asyncio.sleep(0.05)
+    await probes.refresh()
+    assert probes.statuses == {"kb": "ok"}
+    assert calls == 2
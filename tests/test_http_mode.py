@@ -103,3 +103,293 @@ async def test_http_policy_denied() -> None:
     assert response.status_code == 403
     body = response.json()
     assert body["error"]["message"] == "forbidden"
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_middleware_rejects_before_reading_and_forwards_body() -> None:
+    from mcp_cp.policy import ScopePolicy
+    from mcp_cp.server import AuthPolicyMiddleware
+
+    seen: list[Any] = []
+
+    async def app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        seen.append((await receive())["body"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = AuthPolicyMiddleware(app, token="token", policy=ScopePolicy(), max_body_bytes=256)
+    transport = httpx.ASGITransport(app=middleware)
+    headers = {"Authorization": "Bearer token", "X-MCP-Scope": "read"}
+    payload: dict[str, Any] = {
+        "jsonrpc": "2.0",
+        "id": 7,
+        "method": "tools/call",
+        "params": {"name": "kb.search", "arguments": {"query": "x" * 300}},
+    }
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.post("/", json=payload)).status_code == 401
+        assert (await client.post("/", headers=headers, json=payload)).status_code == 413
+        assert (await client.post("/", headers=headers, content=b"{")).status_code == 400
+        payload["params"]["arguments"] = {"query": "disk"}
+        assert (await client.post("/", headers=headers, json=payload)).status_code == 200
+    assert seen == [httpx.Request("POST", "/", json=payload).content]
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_middleware_passes_lifespan_events_to_the_app() -> None:
+    from mcp_cp.policy import ScopePolicy
+    from mcp_cp.server import AuthPolicyMiddleware
+
+    seen: list[str] = []
+
+    async def app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        seen.append(scope["type"])
+        message = await receive()
+        await send({"type": f"{message['type']}.complete"})
+
+    sent: list[dict[str, Any]] = []
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "lifespan.startup"}
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message)
+
+    middleware = AuthPolicyMiddleware(app, token="token", policy=ScopePolicy())
+    await middleware({"type": "lifespan"}, receive, send)
+    assert seen == ["lifespan"]
+    assert sent == [{"type": "lifespan.startup.complete"}]
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_batch_checks_policy_per_call_and_runs_calls_concurrently() -> None:
+    import asyncio
+    import json
+
+    from mcp_cp.policy import ScopePolicy
+    from mcp_cp.server import AuthPolicyMiddleware
+
+    running = 0
+    peak = 0
+
+    async def app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        nonlocal running, peak
+        request = json.loads((await receive())["body"])
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        reply = {"jsonrpc": "2.0", "id": request["id"], "result": request["params"]["name"]}
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": json.dumps(reply).encode()})
+
+    middleware = AuthPolicyMiddleware(app, token="token", policy=ScopePolicy())
+    transport = httpx.ASGITransport(app=middleware)
+    batch = [
+        {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": name}}
+        for i, name in enumerate(["health.check", "kb.search", "audit.query"])
+    ]
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/", headers={"Authorization": "Bearer token", "X-MCP-Scope": "read"}, json=batch
+        )
+    assert response.status_code == 200
+    first, second, third = response.json()
+    assert (first["result"], second["result"]) == ("health.check", "kb.search")
+    assert (third["id"], third["error"]["message"]) == (2, "forbidden")
+    assert peak == 2
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_http_ndjson_audit_stream_resumes_from_cursor() -> None:
+    (
+        default_audit_adapter,
+        default_kb_adapter,
+        ScopePolicy,
+        create_http_app,
+        create_server,
+    ) = _imports()
+    import json
+
+    audit = default_audit_adapter()
+    for i in range(5):
+        audit.append({"event": "bulk", "n": i})
+    server = create_server(default_kb_adapter(), audit, "1.0.0")
+    app = create_http_app(server, token="token", policy=ScopePolicy(), audit_adapter=audit)
+    transport = httpx.ASGITransport(app=app)
+
+    async def page(client: Any, cursor: str | None) -> list[dict[str, Any]]:
+        arguments = {"q": "bulk", "limit": 3, "cursor": cursor}
+        response = await client.post(
+            "/",
+            headers={
+                "Authorization": "Bearer token",
+                "X-MCP-Scope": "audit",
+                "Accept": "application/x-ndjson",
+            },
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": "audit.query", "arguments": arguments},
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await page(client, None)
+        assert [line["fields"]["n"] for line in first[:-1]] == [0, 1, 2]
+        assert first[-1] == {"done": True, "next_cursor": first[-2]["cursor"]}
+        second = await page(client, first[-1]["next_cursor"])
+    assert [line["fields"]["n"] for line in second[:-1]] == [3, 4]
+    assert second[-1] == {"done": True, "next_cursor": None}
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_batch_call_that_raises_becomes_its_own_error() -> None:
+    import json
+
+    from mcp_cp.policy import ScopePolicy
+    from mcp_cp.server import AuthPolicyMiddleware
+
+    async def app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        request = json.loads((await receive())["body"])
+        if request["params"]["name"] == "kb.search":
+            raise RuntimeError("adapter exploded")
+        reply = {"jsonrpc": "2.0", "id": request["id"], "result": "ok"}
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": json.dumps(reply).encode()})
+
+    middleware = AuthPolicyMiddleware(app, token="token", policy=ScopePolicy())
+    transport = httpx.ASGITransport(app=middleware)
+    batch = [
+        {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": name}}
+        for i, name in enumerate(["health.check", "kb.search"])
+    ]
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/", headers={"Authorization": "Bearer token", "X-MCP-Scope": "read"}, json=batch
+        )
+    assert response.status_code == 200
+    first, second = response.json()
+    assert first["result"] == "ok"
+    assert (second["id"], second["error"]["message"]) == (1, "internal_error")
+
+
+async def _search(client: Any, query: str) -> dict[str, Any]:
+    response = await client.post(
+        "/",
+        headers={"Authorization": "Bearer token", "X-MCP-Scope": "read"},
+        json={
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {"name": "kb.search", "arguments": {"query": query}},
+        },
+    )
+    assert response.status_code == 200
+    result: dict[str, Any] = response.json()["result"]
+    return result
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_cached_search_sees_upserted_documents() -> None:
+    (
+        default_audit_adapter,
+        default_kb_adapter,
+        ScopePolicy,
+        create_http_app,
+        create_server,
+    ) = _imports()
+    from mcp_cp.cache import TTLCache
+    from mcp_cp.models import DocumentMetadata, DocumentResource
+
+    kb = default_kb_adapter()
+    server = create_server(kb, default_audit_adapter(), "1.0.0", cache=TTLCache())
+    app = create_http_app(server, token="token", policy=ScopePolicy())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert await _search(client, "rotation") == {"results": []}
+        kb.upsert(
+            DocumentResource(
+                metadata=DocumentMetadata(id="keys", title="Keys"),
+                content="Key rotation runbook.",
+            )
+        )
+        results = (await _search(client, "rotation"))["results"]
+    assert [result["id"] for result in results] == ["keys"]
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_concurrent_identical_searches_share_one_adapter_call() -> None:
+    (
+        default_audit_adapter,
+        _default_kb_adapter,
+        ScopePolicy,
+        create_http_app,
+        create_server,
+    ) = _imports()
+    import asyncio
+    import time
+
+    from mcp_cp.adapters import IndexedKBAdapter
+    from mcp_cp.models import DocumentMetadata, DocumentResource
+
+    calls = 0
+
+    class SlowKB(IndexedKBAdapter):
+        def search(self, query: str, top_k: int) -> Any:
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)
+            return super().search(query, top_k)
+
+    doc = DocumentResource(metadata=DocumentMetadata(id="disk", title="Disk"), content="disk full")
+    server = create_server(SlowKB(documents={"disk": doc}), default_audit_adapter(), "1.0.0")
+    app = create_http_app(server, token="token", policy=ScopePolicy())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        replies = await asyncio.gather(*(_search(client, "disk") for _ in range(5)))
+    assert calls == 1
+    assert all(reply == replies[0] for reply in replies)
+    assert [result["id"] for result in replies[0]["results"]] == ["disk"]
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_max_in_flight_bounds_tool_executions() -> None:
+    (
+        default_audit_adapter,
+        _default_kb_adapter,
+        ScopePolicy,
+        create_http_app,
+        create_server,
+    ) = _imports()
+    import asyncio
+    import threading
+    import time
+
+    from mcp_cp.adapters import IndexedKBAdapter
+
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    class SlowKB(IndexedKBAdapter):
+        def search(self, query: str, top_k: int) -> Any:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return super().search(query, top_k)
+
+    server = create_server(SlowKB(documents={}), default_audit_adapter(), "1.0.0", max_in_flight=2)
+    app = create_http_app(server, token="token", policy=ScopePolicy())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await asyncio.gather(*(_search(client, f"query {i}") for i in range(6)))
+    assert peak == 2
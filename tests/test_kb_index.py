@@ -0,0 +1,156 @@
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("pydantic")
+    from mcp_cp.adapters import IndexedKBAdapter
+    from mcp_cp.models import DocumentMetadata, DocumentResource
+
+    return IndexedKBAdapter, DocumentMetadata, DocumentResource
+
+
+def _adapter() -> Any:
+    IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    return IndexedKBAdapter(
+        documents={
+            "runbook": DocumentResource(
+                metadata=DocumentMetadata(id="runbook", title="Incident runbook"),
+                content="Page the on-call engineer. Check the incident dashboard.",
+            ),
+            "deploy": DocumentResource(
+                metadata=DocumentMetadata(id="deploy", title="Deploy guide"),
+                content="Roll out with helm. Roll back if the incident rate rises.",
+            ),
+            "intro": DocumentResource(
+                metadata=DocumentMetadata(id="intro", title="Welcome"),
+                content="Welcome to the knowledge base.",
+            ),
+        }
+    )
+
+
+def test_indexed_search_ranks_by_relevance() -> None:
+    adapter = _adapter()
+    response = adapter.search("incident runbook", top_k=5)
+    assert [result.id for result in response.results] == ["runbook", "deploy"]
+    assert response.results[0].score > response.results[1].score > 0
+
+
+def test_indexed_search_respects_top_k_and_misses() -> None:
+    adapter = _adapter()
+    assert len(adapter.search("incident", top_k=1).results) == 1
+    assert adapter.search("nonexistent", top_k=5).results == []
+    assert adapter.get_document("intro").metadata.title == "Welcome"
+
+
+def test_upsert_and_delete_update_index_incrementally() -> None:
+    _IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    adapter = _adapter()
+    before = adapter.index.snapshot()
+    adapter.upsert(
+        DocumentResource(
+            metadata=DocumentMetadata(id="intro", title="Welcome"),
+            content="Escalate every incident to the platform team.",
+        )
+    )
+    assert adapter.delete("deploy")
+    assert not adapter.delete("deploy")
+    assert {r.id for r in adapter.search("incident", top_k=5).results} == {"runbook", "intro"}
+    # Readers holding an older snapshot keep a consistent view.
+    assert [hit.segment.doc_id(hit.ordinal) for hit in before.search("incident", top_k=5)] == [
+        "runbook",
+        "deploy",
+    ]
+    with pytest.raises(KeyError):
+        adapter.get_document("deploy")
+
+
+def test_compaction_drops_tombstones() -> None:
+    adapter = _adapter()
+    adapter.delete("deploy")
+    adapter.upsert(adapter.get_document("runbook"))
+    assert adapter.index.compact()
+    snapshot = adapter.index.snapshot()
+    assert not any(snapshot.deleted)
+    assert snapshot.doc_count == sum(len(segment) for segment in snapshot.segments) == 2
+    assert [r.id for r in adapter.search("incident", top_k=5).results] == ["runbook"]
+
+
+def test_mmap_segment_serves_search_and_documents(tmp_path: Any) -> None:
+    IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    from mcp_cp.segments import MmapSegment, write_segment
+
+    path = tmp_path / "kb.seg"
+    write_segment(path, [_adapter().get_document(doc_id) for doc_id in ("runbook", "deploy")])
+    segment = MmapSegment(path)
+    assert len(segment) == 2
+    assert segment.ordinal("deploy") is not None
+    assert segment.ordinal("missing") is None
+
+    adapter = IndexedKBAdapter(documents={}, segment_paths=[str(path)])
+    assert [r.id for r in adapter.search("incident runbook", top_k=5).results] == [
+        "runbook",
+        "deploy",
+    ]
+    document = adapter.get_document("deploy")
+    assert document.metadata.title == "Deploy guide"
+    adapter.upsert(
+        DocumentResource(
+            metadata=DocumentMetadata(id="deploy", title="Deploy guide v2"),
+            content="Use argo.",
+        )
+    )
+    assert adapter.get_document("deploy").metadata.title == "Deploy guide v2"
+    assert [r.id for r in adapter.search("incident", top_k=5).results] == ["runbook"]
+
+
+def test_snippet_centers_on_matched_terms(tmp_path: Any) -> None:
+    IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    from mcp_cp.segments import write_segment
+
+    doc = DocumentResource(
+        metadata=DocumentMetadata(id="long", title="Postmortem"),
+        content="Timeline of the café outage. " + "filler " * 40 + "Root cause: expired TLS cert.",
+    )
+    in_memory = IndexedKBAdapter(documents={"long": doc})
+    write_segment(tmp_path / "kb.seg", [doc])
+    on_disk = IndexedKBAdapter(documents={}, segment_paths=[str(tmp_path / "kb.seg")])
+    for adapter in (in_memory, on_disk):
+        snippet = adapter.search("expired cert", top_k=1).results[0].snippet
+        assert snippet.startswith("...")
+        assert "expired TLS cert" in snippet
+        assert adapter.search("postmortem", top_k=1).results[0].snippet.startswith("Timeline")
+
+
+def test_top_k_matches_full_ranking_prefix() -> None:
+    IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    words = ["alert", "disk", "latency", "pager", "queue", "restart"]
+    documents = {
+        f"doc-{i}": DocumentResource(
+            metadata=DocumentMetadata(id=f"doc-{i}", title=words[i % len(words)]),
+            content=" ".join(words[j % len(words)] for j in range(i, i + i % 7 + 1)),
+        )
+        for i in range(60)
+    }
+    adapter = IndexedKBAdapter(documents=documents)
+    full = [result.id for result in adapter.search("alert disk pager", top_k=60).results]
+    for top_k in (1, 3, 10):
+        results = adapter.search("alert disk pager", top_k=top_k).results
+        assert [result.id for result in results] == full[:top_k]
+
+
+def test_mmap_search_with_equally_frequent_terms(tmp_path: Any) -> None:
+    # Terms with the same bound and idf must not fall through to comparing
+    # their (memoryview) postings.
+    IndexedKBAdapter, DocumentMetadata, DocumentResource = _imports()
+    from mcp_cp.segments import write_segment
+
+    docs = [
+        DocumentResource(metadata=DocumentMetadata(id=doc_id, title="Alert"), content=content)
+        for doc_id, content in (("disk", "disk full on node"), ("cpu", "cpu high on node"))
+    ]
+    write_segment(tmp_path / "kb.seg", docs)
+    adapter = IndexedKBAdapter(documents={}, segment_paths=[str(tmp_path / "kb.seg")])
+    assert sorted(r.id for r in adapter.search("disk cpu", top_k=5).results) == ["cpu", "disk"]
@@ -0,0 +1,104 @@
+import json
+import logging
+import queue
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.logging import (
+        DroppingQueueHandler,
+        JSONFormatter,
+        SamplingFilter,
+        get_logger,
+        parse_sample_rates,
+    )
+
+    return DroppingQueueHandler, JSONFormatter, SamplingFilter, get_logger, parse_sample_rates
+
+
+def test_sampling_keeps_errors_and_full_queue_drops_without_blocking() -> None:
+    DroppingQueueHandler, JSONFormatter, SamplingFilter, get_logger, parse_sample_rates = _imports()
+    from mcp_cp.telemetry import logs_dropped
+
+    records: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(records)
+    handler.addFilter(SamplingFilter(parse_sample_rates("kb.search=0, audit.query=1")))
+    base = logging.getLogger("mcp_cp.test_logging")
+    base.propagate = False
+    base.setLevel(logging.INFO)
+    base.addHandler(handler)
+    try:
+        sampled = logs_dropped.labels(reason="sampled")._value.get()
+        full = logs_dropped.labels(reason="queue_full")._value.get()
+        search = get_logger("r1", "kb.search")
+        search.logger = base
+        search.info("hit %s", "a")
+        search.error("boom")
+        audit = get_logger("r2", "audit.query")
+        audit.logger = base
+        audit.info("rows %d", 3)
+        audit.info("overflow")
+        assert logs_dropped.labels(reason="sampled")._value.get() == sampled + 1
+        assert logs_dropped.labels(reason="queue_full")._value.get() == full + 1
+    finally:
+        base.removeHandler(handler)
+
+    formatter = JSONFormatter()
+    lines = [json.loads(formatter.format(records.get_nowait())) for _ in range(2)]
+    assert lines == [
+        {"level": "ERROR", "message": "boom", "request_id": "r1", "tool_name": "kb.search"},
+        {"level": "INFO", "message": "rows 3", "request_id": "r2", "tool_name": "audit.query"},
+    ]
+
+
+def test_full_queue_waits_for_room_for_warnings(monkeypatch: Any) -> None:
+    DroppingQueueHandler, _JSONFormatter, _SamplingFilter, _get_logger, _parse = _imports()
+    import threading
+
+    from mcp_cp.telemetry import logs_dropped
+
+    records: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=1)
+    handler = DroppingQueueHandler(records)
+    base = logging.getLogger("mcp_cp.test_logging_full")
+    base.propagate = False
+    base.addHandler(handler)
+    try:
+        full = logs_dropped.labels(reason="queue_full")._value.get()
+        base.warning("first")
+        # A reader frees the slot while the error waits for it.
+        threading.Timer(0.05, records.get_nowait).start()
+        base.error("kept")
+        assert logs_dropped.labels(reason="queue_full")._value.get() == full
+        assert records.get_nowait().getMessage() == "kept"
+
+        monkeypatch.setattr("mcp_cp.logging.WARNING_PUT_TIMEOUT_S", 0.01)
+        base.warning("fills")
+        base.error("dropped")
+        assert logs_dropped.labels(reason="queue_full")._value.get() == full + 1
+    finally:
+        base.removeHandler(handler)
+
+
+def test_reconfigure_keeps_tracebacks_and_exits_cleanly() -> None:
+    _imports()
+    import io
+
+    from mcp_cp import logging as mcp_logging
+
+    stream = io.StringIO()
+    mcp_logging.configure_logging()
+    mcp_logging.configure_logging(stream=stream)
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        mcp_logging.get_logger("r1", "audit.query").exception("failed")
+    # What the atexit hook runs; a second call must be a no-op.
+    mcp_logging.stop_logging()
+    mcp_logging.stop_logging()
+    line = json.loads(stream.getvalue())
+    assert line["level"] == "ERROR"
+    assert "ValueError: bad row" in line["exc_info"]
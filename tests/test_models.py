@@ -0,0 +1,61 @@
+import pytest
+
+
+def test_payload_encoder_matches_model_dump_without_sharing_containers() -> None:
+    pytest.importorskip("pydantic")
+    from pydantic import BaseModel, Field
+
+    from mcp_cp.models import (
+        AuditQueryInput,
+        AuditQueryResponse,
+        DocumentMetadata,
+        DocumentResource,
+        to_payload,
+    )
+
+    class Node(BaseModel):
+        name: str
+        children: list["Node"] = Field(default_factory=list)
+        docs: dict[str, list[DocumentMetadata]] | None = None
+        either: DocumentMetadata | int = 1
+
+    class Aliased(BaseModel):
+        value: int = Field(serialization_alias="v")
+
+    rows = [{"timestamp": 1.0, "status": "ok", "nested": {"a": [1]}}, {"status": "error"}]
+    response = AuditQueryResponse.model_validate(
+        {"rows": [{"fields": row} for row in rows], "next_cursor": "c"}
+    )
+    doc = DocumentResource(metadata=DocumentMetadata(id="a", title="A", tags=["x"]), content="body")
+    node = Node(
+        name="root", children=[Node(name="leaf", docs={"k": [doc.metadata]}, either=doc.metadata)]
+    )
+    for model in (response, doc, node, Aliased(value=1), AuditQueryInput()):
+        assert to_payload(model) == model.model_dump()
+
+    payload = to_payload(doc)
+    payload["metadata"]["tags"].append("y")
+    assert doc.metadata.tags == ["x"]
+
+
+def test_payload_encoder_dumps_models_held_in_any_fields() -> None:
+    pytest.importorskip("pydantic")
+    from typing import Any
+
+    from pydantic import BaseModel
+
+    from mcp_cp.models import AuditQueryRow, DocumentMetadata, to_payload
+
+    class Loose(BaseModel):
+        value: Any
+        items: list[Any]
+
+    meta = DocumentMetadata(id="a", title="A", tags=["x"])
+    row = AuditQueryRow(fields={"doc": meta, "nested": {"docs": [meta]}, "n": 1})
+    loose = Loose(value=meta, items=[meta, {"k": meta}])
+    for model in (row, loose):
+        assert to_payload(model) == model.model_dump()
+    # Nothing mutable is shared with the model.
+    payload = to_payload(row)
+    payload["fields"]["nested"]["docs"].append("y")
+    assert row.fields["nested"]["docs"] == [meta]
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from mcp_cp.policy import AccessConfigFile, ScopePolicy
+
+
+def test_policy_table_reuses_decisions() -> None:
+    policy = ScopePolicy()
+    allowed = policy.allows("read", "kb.search")
+    assert allowed.allowed
+    assert policy.allows("audit", "health.check") is allowed
+    denied = policy.allows("read", "audit.query")
+    assert not denied.allowed
+    assert policy.allows("read", "audit.query") is denied
+    assert policy.allows("nope", "kb.search").reason == "scope 'nope' does not allow 'kb.search'"
+
+
+def test_access_file_maps_tokens_to_scopes_and_hot_reloads(tmp_path: Path) -> None:
+    path = tmp_path / "access.json"
+    config = {
+        "scopes": {"read": ["kb.search"], "audit": ["audit.query"]},
+        "tokens": [
+            {"name": "agent", "token": "t-agent", "scopes": ["read"]},
+            {"name": "ops", "sha256": hashlib.sha256(b"t-ops").hexdigest()},
+        ],
+    }
+    path.write_text(json.dumps(config))
+    access = AccessConfigFile(path)
+    credentials = access.current.credentials
+    agent = credentials.authenticate(b"Bearer t-agent")
+    assert agent is not None
+    assert agent.grants("read")
+    assert not agent.grants("audit")
+    ops = credentials.authenticate(b"Bearer t-ops")
+    assert ops is not None
+    assert ops.grants("audit")
+    assert credentials.authenticate(b"Bearer t-agen") is None
+    assert credentials.authenticate(b"t-agent") is None
+
+    config["tokens"] = [{"name": "agent", "token": "t-rotated", "scopes": ["read"]}]
+    path.write_text(json.dumps(config))
+    os.utime(path, ns=(1, 1))
+    assert access.reload()
+    assert access.current.credentials.authenticate(b"Bearer t-agent") is None
+    assert access.current.credentials.authenticate(b"Bearer t-rotated") is not None
+
+    path.write_text("{not json")
+    os.utime(path, ns=(2, 2))
+    assert not access.reload()
+    assert access.current.credentials.authenticate(b"Bearer t-rotated") is not None
@@ -0,0 +1,88 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any
+
+import pytest
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    from mcp_cp.profiling import start_profiling_server
+    from mcp_cp.telemetry import record_stage, stage_latency_ms
+
+    return start_profiling_server, record_stage, stage_latency_ms
+
+
+def _get(url: str, token: str | None = None) -> tuple[int, str]:
+    request = urllib.request.Request(url)
+    if token is not None:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read().decode()
+
+
+def _spin(stop: threading.Event) -> None:
+    kept: list[bytes] = []
+    while not stop.is_set():
+        kept = [*kept[-100:], bytes(1024)]
+
+
+def test_profiling_endpoint_requires_token_and_samples_threads() -> None:
+    start_profiling_server, _record_stage, _stage_latency_ms = _imports()
+    server = start_profiling_server(0, "admin-token", host="127.0.0.1")
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    stop = threading.Event()
+    threading.Thread(target=_spin, args=(stop,), name="spinner", daemon=True).start()
+    try:
+        assert _get(f"{base}/debug/profile?seconds=0.1")[0] == 401
+        assert _get(f"{base}/debug/profile?seconds=0.1", "wrong")[0] == 401
+        assert _get(f"{base}/debug/profile?seconds=600", "admin-token")[0] == 400
+        assert _get(f"{base}/debug/nothing", "admin-token")[0] == 404
+
+        status, folded = _get(f"{base}/debug/profile?seconds=0.2", "admin-token")
+        assert status == 200
+        spinner = [line for line in folded.splitlines() if line.startswith("spinner;")]
+        assert spinner
+        assert "_spin (" in spinner[0]
+        assert int(spinner[0].rsplit(" ", 1)[1]) > 0
+
+        status, allocations = _get(f"{base}/debug/allocations?seconds=0.05", "admin-token")
+        assert status == 200
+        assert "KiB in" in allocations
+    finally:
+        stop.set()
+        server.shutdown()
+
+
+def test_record_stage_observes_and_chains() -> None:
+    _start, record_stage, stage_latency_ms = _imports()
+    histogram = stage_latency_ms.labels(stage="test")
+    before = histogram._sum.get()
+    started = time.perf_counter() - 0.002
+    now = record_stage("test", started)
+    assert now >= started + 0.002
+    assert histogram._sum.get() - before >= 2.0
+
+
+def test_failed_adapter_calls_are_timed() -> None:
+    _start, _record_stage, stage_latency_ms = _imports()
+    pytest.importorskip("pydantic")
+    from mcp_cp.models import KBSearchInput
+    from mcp_cp.server import handle_kb_search
+
+    class Down:
+        def search(self, query: str, top_k: int) -> Any:
+            time.sleep(0.002)
+            raise ConnectionError("kb down")
+
+    histogram = stage_latency_ms.labels(stage="adapter")
+    before = histogram._sum.get()
+    with pytest.raises(ConnectionError):
+        handle_kb_search(Down(), KBSearchInput(query="disk"))  # type: ignore[arg-type]
+    assert histogram._sum.get() - before >= 2.0
@@ -0,0 +1,71 @@
+import json
+from typing import Any
+from urllib.parse import parse_qs
+
+import pytest
+
+pytest.importorskip("pytest_asyncio")
+httpx = pytest.importorskip("httpx")
+
+
+def _imports() -> tuple[Any, ...]:
+    pytest.importorskip("pydantic")
+    from mcp_cp.remote import HTTPAuditAdapter, HTTPKBAdapter, HTTPPoolConfig, create_http_client
+
+    return HTTPAuditAdapter, HTTPKBAdapter, HTTPPoolConfig, create_http_client
+
+
+DOC = {"metadata": {"id": "runbook", "title": "Runbook", "tags": []}, "content": "Restart it."}
+
+
+async def backend(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    # Stand-in for the remote KB and audit services.
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    path = scope["path"]
+    status = 404
+    payload: dict[str, Any] = {"detail": "not found"}
+    if path == "/kb/search":
+        query = parse_qs(scope["query_string"].decode())
+        hit = {"id": "runbook", "title": query["query"][0], "snippet": "", "score": 1.0}
+        status, payload = 200, {"results": [hit] * int(query["top_k"][0])}
+    elif path == "/kb/documents/runbook":
+        status, payload = 200, DOC
+    elif path == "/audit/query":
+        request = json.loads(body)
+        status, payload = 200, {"rows": [{"fields": request}], "next_cursor": "c2"}
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+@pytest.mark.asyncio  # type: ignore[misc]
+async def test_http_adapters_share_pooled_client() -> None:
+    HTTPAuditAdapter, HTTPKBAdapter, HTTPPoolConfig, create_http_client = _imports()
+    config = HTTPPoolConfig(max_connections=4, http2=False)
+    client = create_http_client(config, transport=httpx.ASGITransport(app=backend))
+    kb = HTTPKBAdapter(client, "http://backend/kb")
+    audit = HTTPAuditAdapter(client, "http://backend/audit/")
+    async with client:
+        results = (await kb.search("restart", top_k=2)).results
+        assert [r.title for r in results] == ["restart", "restart"]
+        assert (await kb.get_document("runbook")).content == "Restart it."
+        with pytest.raises(KeyError):
+            await kb.get_document("missing")
+        page = await audit.query("deploy", limit=5, filters={"user": "alice"}, cursor="c1")
+        assert page.rows[0].fields == {
+            "q": "deploy",
+            "limit": 5,
+            "filters": {"user": "alice"},
+            "cursor": "c1",
+        }
+        assert page.next_cursor == "c2"
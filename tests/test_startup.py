@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+# Loaded only to build the MCP server, or for OTLP export, HTTP mode, remote
+# adapters, workers or profiling.
+OPTIONAL_MODULES = (
+    "grpc",
+    "opentelemetry.sdk",
+    "opentelemetry.exporter",
+    "uvicorn",
+    "starlette",
+    "httpx",
+    "mcp.server",
+    "mcp_cp.remote",
+    "mcp_cp.workers",
+    "mcp_cp.profiling",
+)
+# Must stay unloaded through a whole stdio startup. The SDK's server package
+# itself may load httpx, starlette and uvicorn, so those are not checked there.
+STDIO_OPTIONAL_MODULES = (
+    "grpc",
+    "opentelemetry.sdk",
+    "opentelemetry.exporter",
+    "mcp.server.http",
+    "mcp_cp.remote",
+    "mcp_cp.workers",
+    "mcp_cp.profiling",
+)
+# Cumulative import time of mcp_cp.server; override for slow CI machines.
+IMPORT_BUDGET_MS = float(os.getenv("MCP_IMPORT_BUDGET_MS", "750"))
+# From the first import to run_stdio() returning at end of input.
+STARTUP_BUDGET_MS = float(os.getenv("MCP_STARTUP_BUDGET_MS", "2000"))
+# Runs in the child; stdout is the MCP stream, so results go to a file.
+STDIO_STARTUP = """
+import time
+started = time.perf_counter()
+import asyncio, json, sys
+from mcp_cp.server import build_server, run_stdio
+server, _audit, _executor, probes = build_server()
+asyncio.run(run_stdio(server, probes))
+elapsed_ms = (time.perf_counter() - started) * 1000
+with open(sys.argv[1], "w") as out:
+    json.dump({"elapsed_ms": elapsed_ms, "modules": list(sys.modules)}, out)
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess[str]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.getenv("PYTHONPATH", "")])}
+    return subprocess.run(
+        [sys.executable, *args],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+
+def _matching(loaded: list[str], names: tuple[str, ...]) -> list[str]:
+    # Whole packages only: "httpx" must not match "httpx_sse".
+    return sorted(m for m in loaded if any(m == name or m.startswith(f"{name}.") for name in names))
+
+
+def _optional_modules_loaded(code: str) -> list[str]:
+    loaded = json.loads(
+        _python("-c", f"{code}\nimport json, sys\nprint(json.dumps(list(sys.modules)))").stdout
+    )
+    return _matching(loaded, OPTIONAL_MODULES)
+
+
+def test_core_modules_and_metrics_only_tracing_skip_optional_modules() -> None:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    pytest.importorskip("pydantic")
+    code = (
+        "import mcp_cp.adapters, mcp_cp.execution, mcp_cp.logging, mcp_cp.cache, mcp_cp.admission\n"
+        "from mcp_cp.telemetry import configure_tracing, request_span\n"
+        "configure_tracing(mode='metrics')\n"
+        "with request_span('tool', 'health.check'): pass"
+    )
+    assert _optional_modules_loaded(code) == []
+
+
+def test_server_import_stays_lean_and_within_budget() -> None:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    pytest.importorskip("pydantic")
+    assert _optional_modules_loaded("import mcp_cp.server") == []
+    timings = _python("-X", "importtime", "-c", "import mcp_cp.server").stderr.splitlines()
+    line = next(line for line in reversed(timings) if line.endswith("| mcp_cp.server"))
+    cumulative_ms = int(line.split("|")[1]) / 1000
+    assert cumulative_ms < IMPORT_BUDGET_MS
+
+
+def test_stdio_startup_skips_optional_modules_and_stays_within_budget(tmp_path: Path) -> None:
+    pytest.importorskip("prometheus_client")
+    pytest.importorskip("opentelemetry.sdk")
+    pytest.importorskip("pydantic")
+    pytest.importorskip("mcp")
+    result = tmp_path / "startup.json"
+    # stdin is at EOF, so the server starts, sees the end of input and exits.
+    _python("-c", STDIO_STARTUP, str(result))
+    startup = json.loads(result.read_text())
+    assert _matching(startup["modules"], STDIO_OPTIONAL_MODULES) == []
+    assert startup["elapsed_ms"] < STARTUP_BUDGET_MS
@@ -22,3 +22,40 @@ def test_trace_created_for_tool() -> None:
     spans = exporter.get_finished_spans()
     assert spans
     assert spans[0].attributes.get("tool.name") == "health.check"
+
+
+def test_unsampled_requests_trace_only_errors_and_slow_calls(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pytest.importorskip("prometheus_client")
+    TracerProvider = pytest.importorskip("opentelemetry.sdk.trace").TracerProvider
+    trace_export = pytest.importorskip("opentelemetry.sdk.trace.export")
+    in_memory = pytest.importorskip("opentelemetry.sdk.trace.export.in_memory_span_exporter")
+    from mcp_cp import telemetry
+
+    exporter = in_memory.InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(trace_export.SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(telemetry, "_tracer", provider.get_tracer("test"))
+    monkeypatch.setattr(telemetry, "_sampling", telemetry.TraceSampling(ratio=0.0, slow_ms=50))
+    now = [0.0]
+    monkeypatch.setattr("mcp_cp.telemetry.time.perf_counter", lambda: now[0])
+
+    with telemetry.request_span("tool", "kb.search"):
+        now[0] += 0.01
+    with pytest.raises(ValueError), telemetry.request_span("tool", "kb.search"):
+        raise ValueError("boom")
+    with telemetry.request_span("tool", "audit.query"):
+        now[0] += 0.2
+
+    spans = exporter.get_finished_spans()
+    assert [(s.attributes["tool.name"], s.attributes["outcome"]) for s in spans] == [
+        ("kb.search", "error"),
+        ("audit.query", "success"),
+    ]
+    assert spans[1].end_time - spans[1].start_time == 200_000_000
+
+    monkeypatch.setattr(telemetry, "_sampling", telemetry.TraceSampling(enabled=False))
+    with pytest.raises(ValueError), telemetry.request_span("tool", "kb.search"):
+        raise ValueError("boom")
+    assert len(exporter.get_finished_spans()) == 2
@@ -0,0 +1,47 @@
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_cp.workers import bind_reuseport, supervise
+
+
+def _write_pid(index: int, directory: str) -> None:
+    path = Path(directory) / f"{index}-{os.getpid()}"
+    path.write_text("")
+    if index == 0 and len(list(Path(directory).glob("0-*"))) == 1:
+        # The first incarnation of worker 0 dies and must be restarted.
+        raise SystemExit(1)
+    time.sleep(30)
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_workers_share_port() -> None:
+    first = bind_reuseport("127.0.0.1", 0)
+    port = first.getsockname()[1]
+    second = bind_reuseport("127.0.0.1", port)
+    assert second.getsockname()[1] == port
+    first.close()
+    second.close()
+
+
+def test_supervisor_restarts_dead_workers(tmp_path: Path) -> None:
+    exited: list[int] = []
+
+    def stop_when_restarted() -> None:
+        deadline = time.monotonic() + 30
+        while len(list(tmp_path.glob("0-*"))) < 2 or not list(tmp_path.glob("1-*")):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=stop_when_restarted, daemon=True).start()
+    supervise(_write_pid, 2, args=(str(tmp_path),), on_exit=exited.append)
+    assert len(list(tmp_path.glob("0-*"))) == 2
+    assert len(list(tmp_path.glob("1-*"))) == 1
+    assert len(exited) == 3